@@ -1,44 +1,85 @@
 from flask import Flask
 from flask_cors import CORS
-from routes.market import market_bp
-from routes.screener import screener_bp
-from routes.ai import ai_bp
-from routes.patterns import patterns_bp
-from routes.stock import stock_bp
 from dotenv import load_dotenv
-from utils.db import init_db
+import os
+import sys
+import threading
 import logging
 
 load_dotenv()
 
-app = Flask(__name__)
-# Configure CORS with specific settings
-CORS(app, resources={
-    r"/*": {
-        "origins": ["https://groqsense-rphz.onrender.com", "http://localhost:3000", "http://localhost:5173", "https://groqsense.onrender.com"],
-        "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization", "X-Requested-With"]
-    }
-})
-
-# Register Blueprints
-app.register_blueprint(market_bp, url_prefix="/market")
-app.register_blueprint(screener_bp, url_prefix="/screener")
-app.register_blueprint(ai_bp, url_prefix="/ai")
-app.register_blueprint(patterns_bp, url_prefix="/patterns")
-app.register_blueprint(stock_bp, url_prefix="/api/stock")
-
-@app.route("/")
-def home():
-    return {"message": "GroqSense Backend is Running ✅"}
-
-# Initialize database tables
-try:
-    logging.info("Initializing database tables...")
-    init_db()
-    logging.info("Database tables initialized successfully.")
-except Exception as e:
-    logging.error(f"Error initializing database tables: {str(e)}")
+def create_app() -> Flask:
+    """
+    Build the Flask app. Nothing here touches the database or the network, so
+    workers boot quickly; tables are created by `python app.py init-db` and the
+    cache warmer starts with the first request a worker serves.
+    """
+    from routes.market import market_bp
+    from routes.screener import screener_bp
+    from routes.ai import ai_bp
+    from routes.patterns import patterns_bp
+    from routes.stock import stock_bp
+
+    app = Flask(__name__)
+    # orjson-backed JSON encoding (falls back to the stdlib encoder when not installed)
+    from utils.fast_json import FastJSONProvider
+    app.json = FastJSONProvider(app)
+    # Configure CORS with specific settings
+    CORS(app, resources={
+        r"/*": {
+            "origins": ["https://groqsense-rphz.onrender.com", "http://localhost:3000", "http://localhost:5173", "https://groqsense.onrender.com"],
+            "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+            "allow_headers": ["Content-Type", "Authorization", "X-Requested-With"],
+            # Paging state of /screener/filter, which the frontend reads from the response
+            "expose_headers": ["X-Total-Count", "X-Next-Cursor"]
+        }
+    })
+
+    # Register Blueprints
+    app.register_blueprint(market_bp, url_prefix="/market")
+    app.register_blueprint(screener_bp, url_prefix="/screener")
+    app.register_blueprint(ai_bp, url_prefix="/ai")
+    app.register_blueprint(patterns_bp, url_prefix="/patterns")
+    app.register_blueprint(stock_bp, url_prefix="/api/stock")
+
+    # Gzip JSON bodies for clients that accept it
+    from utils.http_caching import compress_response
+    app.after_request(compress_response)
+
+    @app.route("/")
+    def home():
+        return {"message": "GroqSense Backend is Running ✅"}
+
+    # Refresh StockCache in the background so screens rarely hit expired rows.
+    # Started in the worker itself (not at import) so it survives gunicorn's fork;
+    # a database lease lets only one worker's warmer do the refreshing.
+    if os.getenv('CACHE_WARMER_ENABLED', '1') == '1':
+        warmer_started = threading.Event()
+
+        @app.before_request
+        def start_cache_warmer():
+            # The event only skips the import on later requests; start() itself is idempotent
+            if not warmer_started.is_set():
+                from utils.cache_warmer import cache_warmer
+                cache_warmer.start()
+                warmer_started.set()
+
+    return app
+
+app = create_app()
+
+def init_database() -> None:
+    from utils.db import init_db
+    try:
+        logging.info("Initializing database tables...")
+        init_db()
+        logging.info("Database tables initialized successfully.")
+    except Exception as e:
+        logging.error(f"Error initializing database tables: {str(e)}")
+        raise
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    # `python app.py init-db` is the deploy step; the dev server makes sure the tables exist itself
+    init_database()
+    if sys.argv[1:] != ['init-db']:
+        app.run(debug=True)
@@ -0,0 +1,58 @@
+"""
+Import-time report for the backend: how long `import app` takes and which modules
+account for it, from `python -X importtime`.
+
+    python benchmarks/import_report.py            # top 20 modules by cumulative time
+    python benchmarks/import_report.py --top 40
+
+Run from the backend directory. The cache warmer is disabled and DATABASE_URL
+defaults to a throwaway SQLite file, so nothing is contacted while importing.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_import(module: str):
+    env = dict(os.environ, CACHE_WARMER_ENABLED='0')
+    env.setdefault('DATABASE_URL', 'sqlite:////tmp/groqsense-import-report.db')
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        sys.exit(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return wall, result.stderr
+
+def parse_importtime(stderr: str):
+    """(cumulative_us, self_us, module) for every top-level import (one not nested in another)."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        # -X importtime indents nested imports by two spaces per level
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        rows.append((int(cumulative_us), int(self_us), name.strip(), depth))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='app', help='module to import')
+    parser.add_argument('--top', type=int, default=20, help='number of modules to list')
+    args = parser.parse_args()
+
+    wall, stderr = run_import(args.module)
+    rows = parse_importtime(stderr)
+    total_us = sum(cumulative for cumulative, _, _, depth in rows if depth == 0)
+    print(f"import {args.module}: {wall * 1000:.0f} ms wall (interpreter start included), "
+          f"{total_us / 1000:.0f} ms in imports, {len(rows)} modules")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative, self_us, name, depth in sorted(rows, reverse=True)[:args.top]:
+        print(f"{cumulative / 1000:>14.1f} {self_us / 1000:>9.1f}  {'  ' * depth}{name}")
+
+if __name__ == '__main__':
+    main()
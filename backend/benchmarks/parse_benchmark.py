@@ -0,0 +1,88 @@
+"""
+Micro-benchmark for the Moneycontrol and Screener.in page parsers.
+
+Compares the old path (full html.parser tree) with the targeted one (lxml parses
+the page and only the tables each parser reads are built as BeautifulSoup) and
+checks both give the same result.
+
+    python benchmarks/parse_benchmark.py                  # synthetic sample pages
+    python benchmarks/parse_benchmark.py --pages DIR      # saved pages: moneycontrol*.html, screener*.html
+
+Run from the backend directory.
+"""
+import argparse
+import glob
+import os
+import random
+import sys
+import timeit
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.html_parsing import parse_html, HTML_PARSER, MONEYCONTROL_TABLES, SCREENER_TABLES
+from utils.moneycontrol_utils import moneycontrol_fetcher
+from utils.screener_utils import screener_fetcher
+
+def _noise(blocks: int) -> str:
+    """Navigation, ads, scripts and article lists that make up most of a real page."""
+    rng = random.Random(blocks)
+    parts = ['<script>var cfg = {"a": 1, "b": [1, 2, 3]};</script>']
+    for i in range(blocks):
+        links = ''.join(f'<li><a href="/news/{i}-{j}">Headline {i}-{j}</a></li>' for j in range(10))
+        parts.append(
+            f'<div class="widget w{i}"><h3>Section {i}</h3><ul>{links}</ul>'
+            f'<p>{"lorem ipsum " * rng.randint(5, 30)}</p><img src="/img/{i}.png"></div>'
+        )
+    return ''.join(parts)
+
+def _table(css_class: str, rows: int, cols: int) -> str:
+    header = '<tr>' + ''.join(f'<th>Mar {2024 - c}</th>' for c in range(cols)) + '</tr>'
+    body = ''.join(
+        f'<tr><td>Line Item {r}</td>' + ''.join(f'<td>{r * 1000 + c:,}.{c}</td>' for c in range(cols - 1)) + '</tr>'
+        for r in range(rows)
+    )
+    return f'<table class="{css_class}">{header}{body}</table>'
+
+def synthetic_pages():
+    moneycontrol = f'<html><body>{_noise(400)}{_table("mctable1", 60, 6)}{_noise(200)}</body></html>'
+    screener = f'<html><body>{_noise(300)}{_table("data-table", 40, 13)}{_noise(100)}{_table("data-table", 20, 5)}</body></html>'
+    return [('moneycontrol (synthetic)', moneycontrol), ('screener (synthetic)', screener)]
+
+def saved_pages(directory: str):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.html'))):
+        with open(path, encoding='utf-8', errors='replace') as f:
+            pages.append((os.path.basename(path), f.read()))
+    return pages
+
+def benchmark(name: str, markup: str, number: int) -> None:
+    if name.startswith('moneycontrol'):
+        parse, strainer = moneycontrol_fetcher._parse_financial_table, MONEYCONTROL_TABLES
+    else:
+        parse, strainer = screener_fetcher._parse_quarterly_results, SCREENER_TABLES
+
+    full = lambda: parse(BeautifulSoup(markup, 'html.parser'))
+    targeted = lambda: parse(parse_html(markup, strainer))
+    if full() != targeted():
+        print(f"{name}: results differ between full and targeted parsing")
+
+    full_ms = min(timeit.repeat(full, number=number, repeat=3)) / number * 1000
+    targeted_ms = min(timeit.repeat(targeted, number=number, repeat=3)) / number * 1000
+    print(f"{name:<32} {len(markup) / 1024:>7.0f} KiB   html.parser full {full_ms:8.2f} ms   "
+          f"{HTML_PARSER} targeted {targeted_ms:8.2f} ms   {full_ms / targeted_ms:5.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', help='directory of saved moneycontrol*.html / screener*.html pages')
+    parser.add_argument('--number', type=int, default=5, help='parses per timing run')
+    args = parser.parse_args()
+
+    pages = saved_pages(args.pages) if args.pages else synthetic_pages()
+    if not pages:
+        sys.exit(f"No .html pages found in {args.pages}")
+    for name, markup in pages:
+        benchmark(name, markup, args.number)
+
+if __name__ == '__main__':
+    main()
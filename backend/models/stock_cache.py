@@ -1,9 +1,71 @@
 from sqlalchemy import Column, String, DateTime, JSON
 from datetime import datetime
+from typing import Dict, Any, List
 from utils.db import Base
 
+# Rows older than this are treated as misses by the screener
+CACHE_EXPIRY_HOURS = 18
+
+# Keep IN (...) lists and multi-row VALUES well under driver parameter limits
+BULK_CHUNK_SIZE = 500
+
 class StockCache(Base):
     __tablename__ = 'stock_cache'
     symbol = Column(String, primary_key=True, index=True)
     data = Column(JSON)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow) 
\ No newline at end of file
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @classmethod
+    def get_many(cls, session, symbols: List[str]) -> Dict[str, 'StockCache']:
+        """Load cache rows for all symbols with one WHERE symbol IN (...) query per chunk."""
+        symbols = list(dict.fromkeys(symbols))
+        rows = {}
+        for i in range(0, len(symbols), BULK_CHUNK_SIZE):
+            chunk = symbols[i:i + BULK_CHUNK_SIZE]
+            for row in session.query(cls).filter(cls.symbol.in_(chunk)).all():
+                rows[row.symbol] = row
+        return rows
+
+    @classmethod
+    def get_versions(cls, session, symbols: List[str]) -> Dict[str, datetime]:
+        """Return {symbol: updated_at} without loading the JSON payloads."""
+        symbols = list(dict.fromkeys(symbols))
+        versions = {}
+        for i in range(0, len(symbols), BULK_CHUNK_SIZE):
+            chunk = symbols[i:i + BULK_CHUNK_SIZE]
+            for symbol, updated_at in session.query(cls.symbol, cls.updated_at).filter(cls.symbol.in_(chunk)).all():
+                versions[symbol] = updated_at
+        return versions
+
+    @classmethod
+    def upsert_many(cls, session, data_by_symbol: Dict[str, Dict[str, Any]]) -> datetime:
+        """Write all rows with INSERT ... ON CONFLICT DO UPDATE and commit once; returns the updated_at written."""
+        now = datetime.utcnow()
+        if not data_by_symbol:
+            return now
+        values = [
+            {'symbol': symbol, 'data': data, 'updated_at': now}
+            for symbol, data in data_by_symbol.items()
+        ]
+
+        dialect = session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            # No portable upsert; merge still runs inside a single transaction
+            for value in values:
+                session.merge(cls(**value))
+            session.commit()
+            return now
+
+        for i in range(0, len(values), BULK_CHUNK_SIZE):
+            stmt = insert(cls).values(values[i:i + BULK_CHUNK_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[cls.symbol],
+                set_={'data': stmt.excluded.data, 'updated_at': stmt.excluded.updated_at}
+            )
+            session.execute(stmt)
+        session.commit()
+        return now
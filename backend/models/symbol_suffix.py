@@ -0,0 +1,10 @@
+from sqlalchemy import Column, String, DateTime
+from datetime import datetime
+from utils.db import Base
+
+class SymbolSuffix(Base):
+    __tablename__ = 'symbol_suffix'
+    symbol = Column(String, primary_key=True, index=True)
+    # Ticker that returned data (e.g. 'INFY.NS'); NULL when no candidate did
+    resolved = Column(String, nullable=True)
+    checked_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,44 @@
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta
+from utils.db import Base
+
+class WorkerLease(Base):
+    """
+    A named, expiring lease held by one process at a time, for background jobs
+    that every worker starts but only one should run (e.g. the cache warmer).
+    """
+    __tablename__ = 'worker_lease'
+    name = Column(String, primary_key=True)
+    holder = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+    @classmethod
+    def acquire(cls, session, name: str, holder: str, ttl_seconds: float) -> bool:
+        """
+        Take or renew the lease for ttl_seconds; True if holder now owns it.
+        The conditional UPDATE is atomic in the database, so of several workers
+        racing for an expired lease exactly one sees a matched row.
+        """
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=ttl_seconds)
+        updated = session.query(cls).filter(
+            cls.name == name,
+            (cls.holder == holder) | (cls.expires_at < now)
+        ).update({'holder': holder, 'expires_at': expires_at}, synchronize_session=False)
+        if updated:
+            session.commit()
+            return True
+        try:
+            session.add(cls(name=name, holder=holder, expires_at=expires_at))
+            session.commit()
+            return True
+        except IntegrityError:
+            # Someone else holds a live lease
+            session.rollback()
+            return False
+
+    @classmethod
+    def release(cls, session, name: str, holder: str) -> None:
+        session.query(cls).filter(cls.name == name, cls.holder == holder).delete(synchronize_session=False)
+        session.commit()
@@ -1,12 +1,19 @@
 from flask import Blueprint, request, jsonify
 import requests
 import os
+import logging
 from dotenv import load_dotenv
+from utils.groq_utils import chat_completion, stream_chat_completion, sse_relay
+from utils.event_stream import wants_event_stream, event_stream_response
 
 load_dotenv()
 
 ai_bp = Blueprint("ai", __name__)
 
+logger = logging.getLogger(__name__)
+
+AI_MODEL = "mistral-saba-24b"
+
 @ai_bp.route("/query", methods=["POST"])
 def query_ai():
     try:
@@ -20,36 +27,21 @@ def query_ai():
         if not api_key:
             return jsonify({"error": "API key not configured"}), 500
 
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
-
-        payload = {
-            "model": "mistral-saba-24b",
-            "messages": [
-                {"role": "system", "content": "You are a financial advisor. Provide accurate and helpful financial advice."},
-                {"role": "user", "content": query}],
-            "temperature": 0.7
-        }
-
-        print(f"Sending request to Groq API...")  # Debug log
-        res = requests.post(
-            "https://api.groq.com/openai/v1/chat/completions", 
-            headers=headers, 
-            json=payload
-        )
-        
-        print(f"Groq API response status: {res.status_code}")  # Debug log
-        
-        if res.status_code != 200:
-            print(f"Groq API error: {res.text}")  # Debug log
-            return jsonify({"error": f"Groq API Error: {res.text}"}), res.status_code
+        messages = [
+            {"role": "system", "content": "You are a financial advisor. Provide accurate and helpful financial advice."},
+            {"role": "user", "content": query}]
+
+        logger.info("Sending request to Groq API")
+        try:
+            if wants_event_stream(data):
+                return event_stream_response(sse_relay(stream_chat_completion(api_key, AI_MODEL, messages, 0.7)))
+            answer = chat_completion(api_key, AI_MODEL, messages, 0.7)
+        except requests.HTTPError as e:
+            logger.error(f"Groq API error {e.response.status_code}: {e.response.text[:500]}")
+            return jsonify({"error": f"Groq API Error: {e.response.text}"}), e.response.status_code
 
-        json_resp = res.json()
-        answer = json_resp["choices"][0]["message"]["content"]
         return jsonify({"answer": answer})
 
     except Exception as e:
-        print(f"Error in query_ai: {str(e)}")  # Debug log
+        logger.error(f"Error in query_ai: {str(e)}")
         return jsonify({"error": str(e)}), 500
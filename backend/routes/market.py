@@ -1,17 +1,35 @@
 from flask import Blueprint, jsonify
-import yfinance as yf
+from datetime import datetime
+import logging
 from utils.index_list import index_symbols
+from utils.index_snapshot import index_snapshot
+from utils.http_caching import not_modified, version_etag, with_validators
 
 market_bp = Blueprint("market", __name__)
 
 @market_bp.route("/indices")
 def get_indices():
+    try:
+        snapshot = index_snapshot.get()
+    except Exception as e:
+        logging.error(f"Error fetching index snapshot: {str(e)}")
+        return jsonify({'error': 'Index prices are temporarily unavailable'}), 503
+    # The body only changes when the snapshot is refreshed or turns stale
+    etag = version_etag(snapshot["as_of"], snapshot["stale"])
+    as_of = datetime.fromisoformat(snapshot["as_of"].rstrip("Z"))
+    unchanged = not_modified(etag, as_of)
+    if unchanged is not None:
+        return unchanged
+
     data = {}
     for name, symbol in index_symbols.items():
-        ticker = yf.Ticker(symbol)
-        price = ticker.info.get("regularMarketPrice", None)
         data[name] = {
             "symbol": symbol,
-            "price": price
+            "price": snapshot["prices"].get(symbol),
+            "as_of": snapshot["as_of"],
+            "stale": snapshot["stale"]
         }
-    return jsonify(data)
+    response = with_validators(jsonify(data), etag, as_of)
+    response.headers["X-Data-As-Of"] = snapshot["as_of"]
+    response.headers["X-Data-Age"] = str(snapshot["age_seconds"])
+    return response
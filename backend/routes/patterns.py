@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from utils.pattern_recognition import PatternRecognizer
-import pandas as pd
+from utils.groq_utils import sse_relay
+from utils.event_stream import wants_event_stream, event_stream_response
 import logging
 import os
 from dotenv import load_dotenv
@@ -15,6 +16,17 @@ load_dotenv()
 patterns_bp = Blueprint('patterns', __name__)
 pattern_recognizer = PatternRecognizer()
 
+def _historical_frame(historical):
+    """Build a Date/Close/Volume frame from the {dates, prices, volumes} payload the frontend sends."""
+    import pandas as pd
+    if historical and 'prices' in historical and 'dates' in historical:
+        return pd.DataFrame({
+            'Date': historical['dates'],
+            'Close': historical['prices'],
+            'Volume': historical['volumes'] if 'volumes' in historical else [None]*len(historical['dates'])
+        })
+    return pd.DataFrame()
+
 @patterns_bp.route('/analyze-trends', methods=['POST'])
 def analyze_trends():
     try:
@@ -27,17 +39,14 @@ def analyze_trends():
         historical = data.get('historical')
 
         # Use the historical data from the frontend if provided
-        if historical and 'prices' in historical and 'dates' in historical:
-            df = pd.DataFrame({
-                'Date': historical['dates'],
-                'Close': historical['prices'],
-                'Volume': historical['volumes'] if 'volumes' in historical else [None]*len(historical['dates'])
-            })
-        else:
-            df = pd.DataFrame()
+        df = _historical_frame(historical)
+
+        query = f"Analyze trends for {symbol} over {period}."
+        if wants_event_stream(data):
+            return event_stream_response(sse_relay(pattern_recognizer.stream_analyze_chart(df, query)))
 
         # Use PatternRecognizer to analyze the chart
-        summary = pattern_recognizer.analyze_chart(df, f"Analyze trends for {symbol} over {period}.")
+        summary = pattern_recognizer.analyze_chart(df, query)
         logging.info(f"Generated summary: {summary}")
         
         return jsonify({
@@ -51,3 +60,29 @@ def analyze_trends():
             'success': False,
             'error': str(e)
         }), 500
+
+@patterns_bp.route('/detect', methods=['POST'])
+def detect_patterns():
+    try:
+        data = request.json or {}
+        symbol = data.get('symbol')
+        period = data.get('period', '1y')
+
+        # Patterns are found locally; the LLM is only asked for an optional narrative
+        patterns = pattern_recognizer.detect_patterns(_historical_frame(data.get('historical')))
+        response = {
+            'success': True,
+            'patterns': patterns
+        }
+        if data.get('narrate') and patterns:
+            response['narrative'] = pattern_recognizer.describe_patterns(
+                patterns, f"These were found for {symbol} over {period}."
+            )
+        return jsonify(response)
+
+    except Exception as e:
+        logging.error(f"Error in detect_patterns: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
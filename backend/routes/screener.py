@@ -1,53 +1,234 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from utils.stock_metrics_utils import stock_metrics_fetcher
 from utils.tickertape_utils import tickertape_fetcher
 from utils.stock_list_utils import stock_list_fetcher
+from utils.stock_row_utils import build_stock_row, fetch_stock_rows, iter_stock_rows
+from utils.screening_engine import universe_snapshot, SCREENER_FIELDS, SCREENER_METRICS
+from utils.symbol_master import symbol_master
+from utils.single_flight import SingleFlight
+from utils.http_caching import version_etag, not_modified, with_validators
 from utils.companies import NSE_COMPANIES, BSE_COMPANIES, NSE_NEXT_50, BSE_100
 import logging
 import os
+import base64
+import json
+import time
+from collections import Counter
 from utils.db import SessionLocal
-from models.stock_cache import StockCache
+from models.stock_cache import StockCache, CACHE_EXPIRY_HOURS
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime, timedelta
 
 screener_bp = Blueprint('screener', __name__)
 
-CACHE_EXPIRY_HOURS = 18
+# Identical screens running at once share one fetch-and-upsert of their cache misses
+cache_fills = SingleFlight()
 
-def get_cached_stock(session, symbol):
+def get_cached_stocks(session, symbols):
+    """
+    Return ({symbol: StockCache} fresh rows, {symbol: StockCache} expired rows) in one query.
+    Expired rows are kept so they can be served when a refetch fails.
+    """
     try:
-        cache = session.query(StockCache).filter_by(symbol=symbol).first()
-        if cache and (datetime.utcnow() - cache.updated_at) < timedelta(hours=CACHE_EXPIRY_HOURS):
-            return cache.data
-        return None
+        cutoff = datetime.utcnow() - timedelta(hours=CACHE_EXPIRY_HOURS)
+        fresh, stale = {}, {}
+        for symbol, row in StockCache.get_many(session, symbols).items():
+            if row.data:
+                (fresh if row.updated_at > cutoff else stale)[symbol] = row
+        return fresh, stale
     except SQLAlchemyError as e:
-        logging.error(f"Database error in get_cached_stock for {symbol}: {str(e)}")
+        logging.error(f"Database error in get_cached_stocks: {str(e)}")
         session.rollback()  # Roll back the transaction
-        return None
+        return {}, {}
+
+def fill_cached_stocks(session, symbols):
+    """Fetch rows for symbols and upsert them; returns (rows, updated_at written)."""
+    fetched = fetch_stock_rows(symbols)
+    return fetched, set_cached_stocks(session, fetched)
 
-def set_cached_stock(session, symbol, data):
+def set_cached_stocks(session, data_by_symbol):
+    """Upsert every fetched row in a single transaction; returns the updated_at written."""
     try:
-        cache = session.query(StockCache).filter_by(symbol=symbol).first()
-        if cache:
-            cache.data = data
-            cache.updated_at = datetime.utcnow()
-        else:
-            cache = StockCache(symbol=symbol, data=data)
-            session.add(cache)
-        session.commit()
+        return StockCache.upsert_many(session, data_by_symbol)
     except SQLAlchemyError as e:
-        logging.error(f"Database error in set_cached_stock for {symbol}: {str(e)}")
+        logging.error(f"Database error in set_cached_stocks: {str(e)}")
         session.rollback()  # Roll back the transaction
+        return None
+
+# Largest page /screener/filter returns when a limit is given
+MAX_PAGE_SIZE = int(os.getenv('SCREENER_MAX_PAGE_SIZE', '500'))
+
+def _query_options(args):
+    """
+    The GET form of a filter request, as the dict a POST body would carry.
+    exchange, index, sort, cursor and stream are plain parameters, limit is an integer,
+    fields is comma-separated and filters is a JSON object. Raises ValueError with a
+    message for the client.
+    """
+    data = {key: args[key] for key in ('exchange', 'index', 'sort', 'cursor', 'stream') if key in args}
+    if 'filters' in args:
+        try:
+            data['filters'] = json.loads(args['filters'])
+        except ValueError:
+            raise ValueError('filters must be a JSON object')
+        if not isinstance(data['filters'], dict):
+            raise ValueError('filters must be a JSON object')
+    if 'limit' in args:
+        try:
+            data['limit'] = int(args['limit'])
+        except ValueError:
+            raise ValueError('limit must be a positive integer')
+    if 'fields' in args:
+        data['fields'] = [field for field in args['fields'].split(',') if field]
+    return data
+
+def _page_options(data):
+    """
+    Validate the sort / limit / cursor / fields options of a filter request.
+    sort is a field name, '-' prefixed for descending; a limit or cursor without a
+    sort pages by symbol. Raises ValueError with a message for the client.
+    """
+    fields = data.get('fields')
+    if fields is not None:
+        if not isinstance(fields, list) or not all(isinstance(field, str) for field in fields):
+            raise ValueError('fields must be a list of field names')
+        unknown = set(fields) - set(SCREENER_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        # symbol identifies the row, so it is always kept
+        fields = ['symbol'] + [field for field in fields if field != 'symbol']
 
-# Define which metrics should use <= for filtering
-LOWER_BOUND_METRICS = {
-    'pe', 'pb', 'debtToEquity', 'beta', 'priceToCashFlow', 'priceToFreeCashFlow'
+    sort, limit, cursor = data.get('sort'), data.get('limit'), data.get('cursor')
+    paged = sort is not None or limit is not None or cursor is not None
+    if not paged:
+        return {'paged': False, 'fields': fields}
+
+    sort = sort or 'symbol'
+    if not isinstance(sort, str):
+        raise ValueError('sort must be a field name')
+    descending = sort.startswith('-')
+    sort = sort.lstrip('-')
+    if sort != 'symbol' and sort not in SCREENER_METRICS:
+        raise ValueError(f"Cannot sort by {sort}")
+
+    if limit is not None:
+        if isinstance(limit, bool) or not isinstance(limit, int) or limit < 1:
+            raise ValueError('limit must be a positive integer')
+        limit = min(limit, MAX_PAGE_SIZE)
+
+    after = None
+    if cursor is not None:
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            cursor_sort, after = position['sort'], (position['value'], position['symbol'])
+        except Exception:
+            raise ValueError('Invalid cursor')
+        if cursor_sort != ('-' if descending else '') + sort:
+            raise ValueError('cursor was issued for a different sort')
+
+    return {'paged': True, 'fields': fields, 'sort': sort, 'descending': descending,
+            'limit': limit, 'after': after}
+
+def _encode_cursor(sort, descending, key):
+    value, symbol = key
+    position = {'sort': ('-' if descending else '') + sort, 'value': value, 'symbol': symbol}
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+def _project(row, fields):
+    if fields is None:
+        return row
+    return {field: row[field] for field in fields if field in row}
+
+STREAM_MIMETYPES = {
+    'ndjson': 'application/x-ndjson',
+    'sse': 'text/event-stream',
 }
 
-@screener_bp.route('/filter', methods=['POST'])
+def _stream_format(data):
+    """Pick 'ndjson' or 'sse' from the request body or Accept header, or None for a plain response."""
+    stream = data.get('stream')
+    if stream in STREAM_MIMETYPES:
+        return stream
+    best = request.accept_mimetypes.best
+    for stream_format, mimetype in STREAM_MIMETYPES.items():
+        if best == mimetype:
+            return stream_format
+    return None
+
+def _encode_record(stream_format, record_type, payload):
+    if stream_format == 'sse':
+        return f"event: {record_type}\ndata: {json.dumps(payload)}\n\n"
+    return json.dumps({'type': record_type, 'data': payload}) + "\n"
+
+def _stream_filter_results(stocks, filters, stream_format, fields=None):
+    """
+    Yield matching rows as soon as they are evaluated: cache hits first, then each
+    cache miss as its fetch completes (or its expired row, if the fetch failed),
+    then a summary record.
+    """
+    started = time.monotonic()
+    occurrences = Counter(stocks)
+    matched = 0
+    fetched = {}
+    served_stale = 0
+    session = SessionLocal()
+    try:
+        cached, stale = get_cached_stocks(session, stocks)
+        cached_rows = {symbol: row.data for symbol, row in cached.items()}
+        symbol_master.learn_names(cached_rows)
+        symbol_master.learn_names({symbol: row.data for symbol, row in stale.items()})
+        universe_snapshot.update(cached_rows, {symbol: row.updated_at for symbol, row in cached.items()})
+        for stock_data in universe_snapshot.screen(filters, [symbol for symbol in stocks if symbol in cached]):
+            matched += 1
+            yield _encode_record(stream_format, 'row', _project(stock_data, fields))
+
+        missing = [symbol for symbol in dict.fromkeys(stocks) if symbol not in cached]
+        for symbol, stock_data in iter_stock_rows(missing):
+            if stock_data:
+                fetched[symbol] = stock_data
+                universe_snapshot.update({symbol: stock_data})
+            elif symbol in stale:
+                # Upstream failed: serve the last good row rather than nothing
+                served_stale += 1
+                universe_snapshot.update({symbol: stale[symbol].data}, {symbol: stale[symbol].updated_at})
+            else:
+                continue
+            for match in universe_snapshot.screen(filters, [symbol] * occurrences[symbol]):
+                matched += 1
+                yield _encode_record(stream_format, 'row', _project(match, fields))
+
+        yield _encode_record(stream_format, 'summary', {
+            'total': len(stocks),
+            'matched': matched,
+            'cacheHits': len(cached),
+            'fetched': len(fetched),
+            'stale': served_stale,
+            'failed': len(missing) - len(fetched) - served_stale,
+            'elapsedMs': round((time.monotonic() - started) * 1000)
+        })
+    except Exception as e:
+        logging.error(f"Error in streaming filter_stocks: {str(e)}")
+        yield _encode_record(stream_format, 'error', {'error': str(e)})
+    finally:
+        # Keep whatever was fetched, even if the client went away mid-stream
+        if fetched:
+            set_cached_stocks(session, fetched)
+        session.close()
+
+@screener_bp.route('/filter', methods=['GET', 'POST'])
 def filter_stocks():
+    # Streaming and rejected requests return before a session is opened
+    session = None
     try:
-        data = request.get_json() or {}
+        # GET carries the same options in the query string and can be revalidated with a 304
+        conditional = request.method == 'GET'
+        if conditional:
+            try:
+                data = _query_options(request.args)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        else:
+            data = request.get_json() or {}
         filters = data.get('filters', {})
         exchange = data.get('exchange', 'both')  # 'nse', 'bse', or 'both'
         index = data.get('index', 'all')  # 'all', 'nifty50', 'niftynext50', 'sensex30', 'bse100'
@@ -71,69 +252,85 @@ def filter_stocks():
             else:
                 stocks = stock_list_fetcher.get_all_stocks()
         
-        results = []
+        try:
+            options = _page_options(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # Opt-in streaming: rows are sent as they are evaluated
+        stream_format = _stream_format(data)
+        if stream_format:
+            if options['paged']:
+                return jsonify({'error': 'sort, limit and cursor are not supported when streaming'}), 400
+            return Response(
+                stream_with_context(_stream_filter_results(stocks, filters, stream_format, options['fields'])),
+                mimetype=STREAM_MIMETYPES[stream_format],
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
         
         session = SessionLocal()
         try:
+            cached, stale = get_cached_stocks(session, stocks)
+            stock_rows = {symbol: row.data for symbol, row in cached.items()}
+            versions = {symbol: row.updated_at for symbol, row in cached.items()}
+            symbol_master.learn_names(stock_rows)
+            symbol_master.learn_names({symbol: row.data for symbol, row in stale.items()})
+            missing = []
             for symbol in stocks:
-                try:
-                    cached_data = get_cached_stock(session, symbol)
-                    if cached_data:
-                        stock_data = cached_data
-                        logging.info(f"Cache hit for {symbol}")
-                    else:
-                        logging.info(f"Cache miss for {symbol}. Fetching data from web.")
-                        metrics = stock_metrics_fetcher.get_stock_metrics(symbol)
-                        if not metrics:
-                            logging.warning(f"No metrics found for {symbol}")
-                            continue
-                        tickertape_data = tickertape_fetcher.get_stock_overview(symbol)
-                        stock_data = {
-                            'symbol': symbol,
-                            'name': tickertape_data.get('name', symbol),
-                            'exchange': 'NSE' if symbol in stock_list_fetcher.get_nse_stocks() else 'BSE',
-                            'price': metrics.get('price', 0),
-                            'pe': metrics.get('pe', 0),
-                            'pb': metrics.get('pb', 0),
-                            'bookValue': metrics.get('bookValue', 0),
-                            'eps': metrics.get('eps', 0),
-                            'dividendYield': metrics.get('dividendYield', 0),
-                            'roe': metrics.get('roe', 0),
-                            'cagr5Y': metrics.get('cagr5Y', 0),
-                            'debtToEquity': metrics.get('debtToEquity', 0),
-                            'marketCap': metrics.get('marketCap', 0),
-                            'beta': metrics.get('beta', 0),
-                            'avgVolume': metrics.get('avgVolume', 0),
-                            'cashPerShare': metrics.get('cashPerShare', 0),
-                            'priceToCashFlow': metrics.get('priceToCashFlow', 0),
-                            'priceToFreeCashFlow': metrics.get('priceToFreeCashFlow', 0)
-                        }
-                        set_cached_stock(session, symbol, stock_data)
-                        logging.info(f"Data for {symbol} cached in Postgres.")
-                    
-                    # Apply filters
-                    if all(
-                        not filters.get(key) or 
-                        (isinstance(stock_data.get(key), (int, float)) and 
-                        (stock_data[key] <= float(filters[key]) if key in LOWER_BOUND_METRICS 
-                        else stock_data[key] >= float(filters[key])))
-                        for key in filters
-                    ):
-                        results.append(stock_data)
-                    
-                except Exception as e:
-                    logging.error(f"Error processing stock {symbol}: {str(e)}")
-                    session.rollback()  # Roll back the transaction on error
-                    continue
-
-            return jsonify(results)
+                if symbol in stock_rows:
+                    logging.info(f"Cache hit for {symbol}")
+                else:
+                    logging.info(f"Cache miss for {symbol}. Fetching data from web.")
+                    missing.append(symbol)
+
+            # Resolve all cache misses concurrently, then write them back in one upsert
+            if missing:
+                fetched, written_at = cache_fills.do(tuple(sorted(set(missing))), fill_cached_stocks, session, missing)
+                logging.info(f"Data for {len(fetched)} symbols cached in Postgres.")
+                stock_rows.update(fetched)
+                versions.update({symbol: written_at for symbol in fetched})
+
+                # Failed fetches fall back to the expired row; it is served but never rewritten
+                for symbol in set(missing) - set(fetched):
+                    if symbol in stale:
+                        stock_rows[symbol] = stale[symbol].data
+                        versions[symbol] = stale[symbol].updated_at
+
+            # Apply filters as vectorized masks over the columnar snapshot
+            universe_snapshot.update(stock_rows, versions)
+            screened = [symbol for symbol in stocks if symbol in stock_rows]
+            if conditional:
+                # Same options over the same row versions: the client's copy is still current
+                etag = version_etag(json.dumps(data, sort_keys=True), [(symbol, versions.get(symbol)) for symbol in screened])
+                last_modified = max((version for version in versions.values() if version), default=None)
+                unchanged = not_modified(etag, last_modified)
+                if unchanged is not None:
+                    return unchanged
+
+            if not options['paged']:
+                results = universe_snapshot.screen(filters, screened)
+                response = jsonify([_project(row, options['fields']) for row in results])
+                return with_validators(response, etag, last_modified) if conditional else response
+
+            # Sorted, keyset-paginated page; the body stays a list and paging state goes in headers
+            rows, total, last_key = universe_snapshot.page(
+                filters, screened, options['sort'], options['descending'], options['limit'], options['after']
+            )
+            response = jsonify([_project(row, options['fields']) for row in rows])
+            if conditional:
+                with_validators(response, etag, last_modified)
+            response.headers['X-Total-Count'] = str(total)
+            if last_key is not None:
+                response.headers['X-Next-Cursor'] = _encode_cursor(options['sort'], options['descending'], last_key)
+            return response
         
         except Exception as e:
             logging.error(f"Error in filter_stocks: {str(e)}")
             session.rollback()  # Roll back the transaction on error
             return jsonify([]), 500
     finally:
-        session.close()
+        if session is not None:
+            session.close()
 
 @screener_bp.route('/get-stock-data', methods=['POST'])
 def get_stock_data():
@@ -156,28 +353,19 @@ def get_stock_data():
             return jsonify({'error': 'Failed to fetch tickertape data'}), 500
         
         # Combine data
-        stock_data = {
-            'symbol': symbol,
-            'name': tickertape_data.get('name', symbol),
-            'exchange': 'NSE' if symbol in stock_list_fetcher.get_nse_stocks() else 'BSE',
-            'price': metrics.get('price', 0),
-            'pe': metrics.get('pe', 0),
-            'pb': metrics.get('pb', 0),
-            'bookValue': metrics.get('bookValue', 0),
-            'eps': metrics.get('eps', 0),
-            'dividendYield': metrics.get('dividendYield', 0),
-            'roe': metrics.get('roe', 0),
-            'cagr5Y': metrics.get('cagr5Y', 0),
-            'debtToEquity': metrics.get('debtToEquity', 0),
-            'marketCap': metrics.get('marketCap', 0),
-            'beta': metrics.get('beta', 0),
-            'avgVolume': metrics.get('avgVolume', 0),
-            'cashPerShare': metrics.get('cashPerShare', 0),
-            'priceToCashFlow': metrics.get('priceToCashFlow', 0),
-            'priceToFreeCashFlow': metrics.get('priceToFreeCashFlow', 0)
-        }
+        stock_data = build_stock_row(symbol, metrics, tickertape_data)
         
         return jsonify(stock_data)
     except Exception as e:
         logging.error(f"Error in get_stock_data: {str(e)}")
         return jsonify({'error': str(e)}), 500
+
+@screener_bp.route('/symbols/search', methods=['GET'])
+def search_symbols():
+    """Prefix/fuzzy search over symbols and company names for autocomplete."""
+    query = request.args.get('q', '')
+    try:
+        limit = min(int(request.args.get('limit', 10)), 50)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    return jsonify(symbol_master.search(query, limit))
@@ -1,16 +1,22 @@
-from flask import Blueprint, jsonify, request
-import yfinance as yf
-import pandas as pd
-from datetime import datetime, timedelta
+from flask import Blueprint, Response, jsonify, request
+import numpy as np
+from utils.ohlcv_store import ohlcv_store, bar_dates
+from utils.symbol_resolver import symbol_resolver
+from utils.single_flight import SingleFlight
+from utils.http_caching import not_modified, version_etag, with_validators
+from utils.series_encoding import series_mimetypes, pack_bars, arrow_bars, PACKED_MIMETYPE, ARROW_MIMETYPE
 
 stock_bp = Blueprint('stock', __name__)
 
+# Concurrent lookups of the same symbol share one yfinance info request
+info_flights = SingleFlight()
+
 @stock_bp.route('/<symbol>')
 def get_stock(symbol):
     try:
-        # Fetch stock info using yfinance
-        stock = yf.Ticker(symbol)
-        info = stock.info
+        # Fetch stock info using yfinance (imported here to keep worker startup light)
+        import yfinance as yf
+        info = info_flights.do(symbol, lambda: yf.Ticker(symbol).info)
         # Extract some common metrics
         metrics = {
             'symbol': symbol,
@@ -47,32 +53,37 @@ def get_historical_data(symbol):
         }
         interval, period = range_mapping.get(range_param, ('1d', '1mo'))
 
-        # Try with .NS and .BSE if not present and if no data is found
-        original_symbol = symbol
-        stock = yf.Ticker(symbol)
-        hist = stock.history(interval=interval, period=period)
-        if hist.empty and not symbol.endswith('.NS') and not symbol.endswith('.BSE'):
-            test_ns = yf.Ticker(symbol + '.NS').history(interval=interval, period=period)
-            if not test_ns.empty:
-                symbol = symbol + '.NS'
-                hist = test_ns
-            else:
-                test_bse = yf.Ticker(symbol + '.BSE').history(interval=interval, period=period)
-                if not test_bse.empty:
-                    symbol = symbol + '.BSE'
-                    hist = test_bse
+        # Resolve the bare/.NS/.BSE ticker once and remember it (misses included)
+        resolved, bars = symbol_resolver.resolve(
+            symbol, lambda ticker: ohlcv_store.get(ticker, interval, period), scope=f"{interval}:{period}"
+        )
+        if resolved is None:
+            return jsonify({'error': f'No historical data found for symbol {symbol}'}), 404
+
+        # JSON unless the client asks for a binary format in Accept
+        mimetype = request.accept_mimetypes.best_match(series_mimetypes()) or 'application/json'
 
-        print(f"YFinance HIST for {symbol}:\n", hist)
-        if hist.empty:
-            return jsonify({'error': f'No historical data found for symbol {original_symbol}'}), 404
+        # Versioned by the bars served: the last bar may still be forming, so its values count too
+        last = bars[-1] if len(bars) else None
+        etag = version_etag(mimetype, resolved, interval, period, len(bars),
+                            None if last is None else (int(last['date']), float(last['close']), int(last['volume'])))
+        unchanged = not_modified(etag)
+        if unchanged is not None:
+            unchanged.vary.add('Accept')
+            return unchanged
 
-        dates = hist.index.strftime('%Y-%m-%d').tolist()
-        prices = hist['Close'].tolist()
-        volumes = hist['Volume'].tolist()
-        return jsonify({
-            'dates': dates,
-            'prices': prices,
-            'volumes': volumes
-        })
+        if mimetype == PACKED_MIMETYPE:
+            response = Response(pack_bars(bars), mimetype=mimetype)
+        elif mimetype == ARROW_MIMETYPE:
+            response = Response(arrow_bars(bars), mimetype=mimetype)
+        else:
+            # Price and volume columns go to the encoder as NumPy buffers, no per-value lists
+            response = jsonify({
+                'dates': bar_dates(bars).tolist(),
+                'prices': np.ascontiguousarray(bars['close']),
+                'volumes': np.ascontiguousarray(bars['volume'])
+            })
+        response.vary.add('Accept')
+        return with_validators(response, etag)
     except Exception as e:
         return jsonify({'error': str(e)}), 500 
\ No newline at end of file
@@ -0,0 +1,322 @@
+import asyncio
+import concurrent.futures
+import logging
+import os
+import random
+import threading
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+from .http_client import DEFAULT_TIMEOUT, RETRY_STATUSES
+from .ttl_cache import MISSING, is_cacheable
+from .html_parsing import parse_html
+from .circuit_breaker import circuit_breakers
+from .nse_utils import nse_fetcher
+from .moneycontrol_utils import moneycontrol_fetcher
+from .screener_utils import screener_fetcher
+from .tickertape_utils import tickertape_fetcher
+
+if TYPE_CHECKING:
+    import httpx
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Requests in flight per source on the shared event loop
+SOURCE_CONCURRENCY = {
+    'nse': int(os.getenv('NSE_MAX_CONCURRENCY', '8')),
+    'moneycontrol': int(os.getenv('MONEYCONTROL_MAX_CONCURRENCY', '8')),
+    'screener': int(os.getenv('SCREENER_IN_MAX_CONCURRENCY', '4')),
+    'tickertape': int(os.getenv('TICKERTAPE_MAX_CONCURRENCY', '4')),
+    'bharat': int(os.getenv('BHARAT_MAX_CONCURRENCY', '4')),
+}
+
+class AsyncHTTPClient:
+    """
+    httpx.AsyncClient counterpart of HTTPClient: pooled keep-alive connections,
+    connect/read timeouts, and bounded jittered retries on transport errors and RETRY_STATUSES.
+    httpx is imported and the underlying client created on first use, inside the event loop that uses it.
+    """
+
+    def __init__(self, timeout: Tuple[float, float] = DEFAULT_TIMEOUT, max_retries: int = 2,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 max_connections: int = 200, max_keepalive_connections: int = 50):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._client: Optional['httpx.AsyncClient'] = None
+
+    @property
+    def client(self) -> 'httpx.AsyncClient':
+        if self._client is None:
+            import httpx
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout[1], connect=self.timeout[0]),
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_keepalive_connections),
+                headers={'Accept-Encoding': 'gzip, deflate'},
+                follow_redirects=True
+            )
+        return self._client
+
+    async def get(self, url: str, **kwargs) -> 'httpx.Response':
+        import httpx
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self.client.get(url, **kwargs)
+            except httpx.TransportError as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"GET {url} failed ({str(e)}); retrying in {delay:.2f}s")
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    return response
+                delay = self._backoff(attempt)
+                logger.warning(f"GET {url} returned {response.status_code}; retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+class AsyncSingleFlight:
+    """SingleFlight for coroutines: concurrent awaits of the same key share one task."""
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        # A cancelled waiter must not cancel the fetch the others are waiting on
+        return await asyncio.shield(task)
+
+class AsyncSource:
+    """
+    Async variant of a sync fetcher. Endpoints map each sync method name to its URL
+    path, the sync fetcher's parser for the payload, and whether the payload is JSON.
+    Results go through the sync method's TTL cache, so both variants share entries.
+    """
+
+    name = ''
+    endpoints: Dict[str, Tuple[str, Optional[str], bool]] = {}
+
+    def __init__(self, fetcher, client: AsyncHTTPClient):
+        self.fetcher = fetcher
+        self.client = client
+        self.breaker = None
+        self._flights = AsyncSingleFlight()
+        self._pages = AsyncSingleFlight()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def fetch(self, method: str, symbol: str) -> Any:
+        cache = getattr(type(self.fetcher), method).cache
+        cached = cache.get((symbol,))
+        if cached is not MISSING:
+            return cached
+        return await self._flights.do((method, symbol), lambda: self._load(method, symbol, cache))
+
+    def __getattr__(self, method: str):
+        if method in type(self).endpoints:
+            return lambda symbol: self.fetch(method, symbol)
+        raise AttributeError(method)
+
+    async def _load(self, method: str, symbol: str, cache) -> Any:
+        path, parser, as_json = self.endpoints[method]
+        if self.breaker and not self.breaker.allow():
+            return self._fallback(method, symbol)
+        url = self.fetcher.base_url + path.format(symbol=symbol)
+        section = None if as_json else getattr(self.fetcher, 'page_strainers', {}).get(parser)
+        try:
+            # Endpoints sharing a page (e.g. balance-sheetVI) share one download and parse
+            page = await self._pages.do((url, section), lambda: self._download(url, as_json, section))
+            result = self._parse(method, parser, page, symbol)
+        except Exception as e:
+            logger.error(f"Error fetching {self.name} {method} for {symbol}: {str(e)}")
+            return self._fallback(method, symbol)
+
+        if is_cacheable(result):
+            cache.set((symbol,), result)
+        return result
+
+    async def _download(self, url: str, as_json: bool, section) -> Any:
+        """Fetch url and return its JSON payload or its parsed page section."""
+        import httpx
+        # Created here so it binds to the running loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(SOURCE_CONCURRENCY[self.name])
+        async with self._semaphore:
+            try:
+                response = await self.client.get(url, headers=self.fetcher.headers)
+            except httpx.TransportError:
+                self._record(False)
+                raise
+        self._record(response.status_code < 500 and response.status_code != 429)
+        response.raise_for_status()
+        if as_json:
+            return response.json()
+        # Parsing is CPU-bound; keep it off the event loop
+        return await asyncio.to_thread(parse_html, response.text, section)
+
+    def _parse(self, method: str, parser: Optional[str], payload: Any, symbol: str) -> Any:
+        return getattr(self.fetcher, parser)(payload) if parser else payload
+
+    def _fallback(self, method: str, symbol: str) -> Any:
+        return None
+
+    def _record(self, healthy: bool) -> None:
+        if self.breaker:
+            if healthy:
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+
+class AsyncNSESource(AsyncSource):
+    name = 'nse'
+    endpoints = {
+        'get_ohlc': ('/api/quote-equity?symbol={symbol}', '_parse_ohlc', True),
+        'get_option_chain': ('/api/option-chain-equities?symbol={symbol}', None, True),
+        'get_technical_indicators': ('/api/technical-indicators?symbol={symbol}', None, True),
+        'get_corporate_info': ('/api/quote-equity?symbol={symbol}', '_parse_corporate_info', True),
+    }
+
+class AsyncMoneycontrolSource(AsyncSource):
+    name = 'moneycontrol'
+    endpoints = {
+        'get_mini_statement': ('/financials/{symbol}/balance-sheetVI', '_parse_mini_statement', False),
+        'get_balance_sheet': ('/financials/{symbol}/balance-sheetVI', '_parse_financial_table', False),
+        'get_income_statement': ('/financials/{symbol}/profit-lossVI', '_parse_financial_table', False),
+        'get_cash_flow': ('/financials/{symbol}/cash-flowVI', '_parse_financial_table', False),
+        'get_ratios': ('/financials/{symbol}/ratiosVI', '_parse_financial_table', False),
+    }
+
+class AsyncScreenerSource(AsyncSource):
+    name = 'screener'
+    endpoints = {
+        'get_company_info': ('/company/{symbol}/', '_parse_company_info', False),
+        'get_financial_ratios': ('/company/{symbol}/ratios/', '_parse_financial_ratios', False),
+        'get_quarterly_results': ('/company/{symbol}/consolidated/', '_parse_quarterly_results', False),
+        'get_shareholding': ('/company/{symbol}/shareholding/', '_parse_shareholding', False),
+    }
+
+class AsyncTickertapeSource(AsyncSource):
+    name = 'tickertape'
+    endpoints = {
+        'get_stock_overview': ('/stocks/{symbol}/overview', None, True),
+        'get_technical_analysis': ('/stocks/{symbol}/technical', '_parse_technical_data', True),
+        'get_fundamental_analysis': ('/stocks/{symbol}/fundamentals', '_parse_fundamental_data', True),
+        'get_peer_comparison': ('/stocks/{symbol}/peers', '_parse_peer_data', True),
+    }
+
+    def __init__(self, fetcher, client: AsyncHTTPClient):
+        super().__init__(fetcher, client)
+        self.breaker = circuit_breakers['tickertape']
+
+    def _parse(self, method: str, parser: Optional[str], payload: Any, symbol: str) -> Any:
+        if method == 'get_stock_overview':
+            return self.fetcher._parse_stock_overview(payload, symbol)
+        return super()._parse(method, parser, payload, symbol)
+
+    def _fallback(self, method: str, symbol: str) -> Any:
+        if method == 'get_stock_overview':
+            return self.fetcher._get_fallback_data(symbol)
+        return None
+
+class AsyncBharatSource:
+    """Bharat-SM-Data clients are blocking; their calls run in worker threads, bounded per source."""
+
+    name = 'bharat'
+    methods = {'get_bharat_stock_info', 'get_option_chain', 'get_technical_indicators', 'get_fundamental_analysis'}
+
+    def __init__(self):
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def fetch(self, method: str, symbol: str) -> Any:
+        if method not in self.methods:
+            raise AttributeError(method)
+        # Imported on first use: the Bharat clients are built at import time
+        from . import bharat_utils
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(SOURCE_CONCURRENCY[self.name])
+        async with self._semaphore:
+            return await asyncio.to_thread(getattr(bharat_utils, method), symbol)
+
+class BackgroundLoop:
+    """
+    One event loop on a daemon thread per process, started on first use (so after a
+    gunicorn fork). Sync code hands it coroutines and gets concurrent futures back.
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='async-fetch', daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def submit(self, coro: Awaitable[Any]) -> concurrent.futures.Future:
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        return self.submit(coro).result(timeout)
+
+# Create global instances
+async_http_client = AsyncHTTPClient()
+async_sources = {
+    'nse': AsyncNSESource(nse_fetcher, async_http_client),
+    'moneycontrol': AsyncMoneycontrolSource(moneycontrol_fetcher, async_http_client),
+    'screener': AsyncScreenerSource(screener_fetcher, async_http_client),
+    'tickertape': AsyncTickertapeSource(tickertape_fetcher, async_http_client),
+    'bharat': AsyncBharatSource(),
+}
+background_loop = BackgroundLoop()
+
+async def gather_symbols(source: str, method: str, symbols: List[str]) -> Dict[str, Any]:
+    """Run one fetcher method for many symbols at once; per-source limits still apply."""
+    symbols = list(dict.fromkeys(symbols))
+    results = await asyncio.gather(*(async_sources[source].fetch(method, symbol) for symbol in symbols))
+    return dict(zip(symbols, results))
+
+async def fetch_company_profile(symbol: str) -> Dict[str, Any]:
+    """Quote, corporate info, statements and overview for one symbol from every source concurrently."""
+    parts = {
+        'quote': ('nse', 'get_ohlc'),
+        'corporate': ('nse', 'get_corporate_info'),
+        'ratios': ('moneycontrol', 'get_ratios'),
+        'company': ('screener', 'get_company_info'),
+        'overview': ('tickertape', 'get_stock_overview'),
+    }
+    results = await asyncio.gather(*(async_sources[source].fetch(method, symbol) for source, method in parts.values()))
+    return dict(zip(parts, results))
+
+async def fetch_fundamentals(symbol: str) -> Dict[str, Any]:
+    """Statements, ratios and peers concurrently; pages shared by several statements are fetched once."""
+    parts = {
+        'mini_statement': ('moneycontrol', 'get_mini_statement'),
+        'balance_sheet': ('moneycontrol', 'get_balance_sheet'),
+        'income_statement': ('moneycontrol', 'get_income_statement'),
+        'cash_flow': ('moneycontrol', 'get_cash_flow'),
+        'ratios': ('moneycontrol', 'get_ratios'),
+        'peer_comparison': ('tickertape', 'get_peer_comparison'),
+    }
+    results = await asyncio.gather(*(async_sources[source].fetch(method, symbol) for source, method in parts.values()))
+    return dict(zip(parts, results))
+
+def fetch_many(source: str, method: str, symbols: List[str], timeout: Optional[float] = None) -> Dict[str, Any]:
+    """Sync facade over gather_symbols for Flask routes and worker threads."""
+    return background_loop.run(gather_symbols(source, method, symbols), timeout)
+
+def submit_fetch(source: str, method: str, symbol: str) -> concurrent.futures.Future:
+    """Start one async fetch from sync code; the future works with concurrent.futures.as_completed."""
+    return background_loop.submit(async_sources[source].fetch(method, symbol))
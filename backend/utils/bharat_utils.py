@@ -1,29 +1,49 @@
-from Bharat_sm_data import NSE, Moneycontrol, Tickertape
 import logging
-from typing import Dict, Any
-from functools import lru_cache
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Tuple
+from .ttl_cache import ttl_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize clients
-nse = NSE()
-moneycontrol = Moneycontrol()
-tickertape = Tickertape()
+# Bharat-SM-Data clients, built on first use so importing this module stays cheap
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
 
-@lru_cache(maxsize=1000)
+def _client(name: str) -> Any:
+    """The shared 'nse', 'moneycontrol' or 'tickertape' client."""
+    if name not in _clients:
+        with _clients_lock:
+            if not _clients:
+                from Bharat_sm_data import NSE, Moneycontrol, Tickertape
+                _clients.update(nse=NSE(), moneycontrol=Moneycontrol(), tickertape=Tickertape())
+    return _clients[name]
+
+# Shared pool for the independent client calls behind one composite lookup
+_pool = ThreadPoolExecutor(max_workers=int(os.getenv('BHARAT_FETCH_WORKERS', '8')), thread_name_prefix='bharat')
+
+def _fetch_parallel(calls: Dict[str, Tuple[Callable, str]]) -> Dict[str, Any]:
+    """
+    Start every (client method, symbol) call at once and wait for all of them, so a
+    composite lookup takes as long as its slowest source. Re-raises the first failure.
+    """
+    futures = {key: _pool.submit(fn, symbol) for key, (fn, symbol) in calls.items()}
+    return {key: future.result() for key, future in futures.items()}
+
+@ttl_cache(ttl_seconds=900, max_entries=1000)
 def get_bharat_stock_info(symbol: str) -> Dict[str, Any]:
     """Get comprehensive stock information using Bharat-SM-Data."""
     try:
-        # Get basic info from NSE
-        nse_info = nse.get_ohlc(symbol)
-        
-        # Get fundamental data from Moneycontrol
-        mc_info = moneycontrol.get_mini_statement(symbol)
-        
-        # Get additional metrics from Tickertape
-        tt_info = tickertape.get_key_ratios(symbol)
+        # Basic info from NSE, fundamentals from Moneycontrol, ratios from Tickertape, all at once
+        parts = _fetch_parallel({
+            'nse': (_client('nse').get_ohlc, symbol),
+            'moneycontrol': (_client('moneycontrol').get_mini_statement, symbol),
+            'tickertape': (_client('tickertape').get_key_ratios, symbol),
+        })
+        nse_info, mc_info, tt_info = parts['nse'], parts['moneycontrol'], parts['tickertape']
         
         # Combine all data
         return {
@@ -73,7 +93,7 @@ def get_bharat_stock_info(symbol: str) -> Dict[str, Any]:
 def get_option_chain(symbol: str) -> Dict[str, Any]:
     """Get option chain data for a symbol."""
     try:
-        return nse.get_option_chain(symbol)
+        return _client('nse').get_option_chain(symbol)
     except Exception as e:
         logger.error(f"Error fetching option chain for {symbol}: {str(e)}")
         return None
@@ -81,7 +101,7 @@ def get_option_chain(symbol: str) -> Dict[str, Any]:
 def get_technical_indicators(symbol: str) -> Dict[str, Any]:
     """Get technical indicators for a symbol."""
     try:
-        return nse.get_technical_indicators(symbol)
+        return _client('nse').get_technical_indicators(symbol)
     except Exception as e:
         logger.error(f"Error fetching technical indicators for {symbol}: {str(e)}")
         return None
@@ -89,22 +109,14 @@ def get_technical_indicators(symbol: str) -> Dict[str, Any]:
 def get_fundamental_analysis(symbol: str) -> Dict[str, Any]:
     """Get comprehensive fundamental analysis."""
     try:
-        # Get financial statements
-        balance_sheet = moneycontrol.get_balance_sheet(symbol)
-        income_statement = moneycontrol.get_income_statement(symbol)
-        cash_flow = moneycontrol.get_cash_flow(symbol)
-        
-        # Get ratios and metrics
-        ratios = moneycontrol.get_ratios(symbol)
-        peer_comparison = tickertape.get_peer_comparison(symbol)
-        
-        return {
-            "balance_sheet": balance_sheet,
-            "income_statement": income_statement,
-            "cash_flow": cash_flow,
-            "ratios": ratios,
-            "peer_comparison": peer_comparison
-        }
+        # Financial statements, ratios and peers are independent pages; fetch them together
+        return _fetch_parallel({
+            "balance_sheet": (_client('moneycontrol').get_balance_sheet, symbol),
+            "income_statement": (_client('moneycontrol').get_income_statement, symbol),
+            "cash_flow": (_client('moneycontrol').get_cash_flow, symbol),
+            "ratios": (_client('moneycontrol').get_ratios, symbol),
+            "peer_comparison": (_client('tickertape').get_peer_comparison, symbol)
+        })
     except Exception as e:
         logger.error(f"Error fetching fundamental analysis for {symbol}: {str(e)}")
         return None 
\ No newline at end of file
@@ -0,0 +1,144 @@
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy.exc import SQLAlchemyError
+from models.stock_cache import StockCache, CACHE_EXPIRY_HOURS
+from models.worker_lease import WorkerLease
+from .db import SessionLocal
+from .companies import NSE_COMPANIES, BSE_COMPANIES, NSE_NEXT_50, BSE_100, ALL_COMPANIES
+from .stock_row_utils import fetch_stock_rows, recently_failed
+from .screening_engine import universe_snapshot
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Name of the lease that picks the one warmer (across workers and hosts) allowed to run
+LEASE_NAME = 'cache_warmer'
+
+# Index lists refreshed first, highest priority first; anything else follows
+PRIORITY_TIERS = [NSE_COMPANIES, BSE_COMPANIES, NSE_NEXT_50, BSE_100, ALL_COMPANIES]
+
+class CacheWarmer:
+    """
+    Background thread that refreshes StockCache rows before they expire.
+    Each tick refreshes at most batch_size due symbols, so upstream load is spread
+    over time instead of landing on the first screen after expiry.
+    Every worker starts a warmer, but only the holder of the 'cache_warmer'
+    WorkerLease refreshes; the others keep polling and take over if it lapses.
+    """
+
+    def __init__(self, lead_hours: float = 2, batch_size: int = 10, interval_seconds: float = 30,
+                 retry_after_minutes: float = 60):
+        self.lead_hours = lead_hours
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+        self.retry_after = timedelta(minutes=retry_after_minutes)
+        # Symbols whose last refresh returned nothing, so they don't block the batch head
+        self._failed_at: Dict[str, datetime] = {}
+        self.tiers = self._priority_tiers()
+        self.universe = list(self.tiers)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        # A leader that stops ticking loses the lease after a few missed intervals
+        self.lease_seconds = 3 * interval_seconds
+
+    def start(self) -> None:
+        """Start the background thread; calling it again while it runs does nothing."""
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='cache-warmer', daemon=True)
+            self._thread.start()
+        logger.info(f"Cache warmer started for {len(self.universe)} symbols")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def is_leader(self, session) -> bool:
+        """Take or renew the warmer lease; False while another process holds it."""
+        try:
+            return WorkerLease.acquire(session, LEASE_NAME, self.holder, self.lease_seconds)
+        except SQLAlchemyError as e:
+            logger.error(f"Database error taking the cache warmer lease: {str(e)}")
+            session.rollback()
+            return False
+
+    def due_symbols(self, session) -> List[str]:
+        """Symbols that are missing or will expire within lead_hours, in priority order."""
+        now = datetime.utcnow()
+        refresh_before = now - timedelta(hours=CACHE_EXPIRY_HOURS - self.lead_hours)
+        versions = StockCache.get_versions(session, self.universe)
+        due = [
+            symbol for symbol in self.universe
+            if (versions.get(symbol) is None or versions[symbol] < refresh_before)
+            and now - self._failed_at.get(symbol, datetime.min) > self.retry_after
+        ]
+        # Missing rows first within the same priority, then oldest first
+        return sorted(due, key=lambda symbol: (self.tiers[symbol], versions.get(symbol) or datetime.min))
+
+    def warm_once(self) -> int:
+        """Refresh the next batch of due symbols; returns how many rows were written."""
+        session = SessionLocal()
+        try:
+            if not self.is_leader(session):
+                return 0
+            batch = self.due_symbols(session)[:self.batch_size]
+            if not batch:
+                return 0
+            fetched = fetch_stock_rows(batch)
+            now = datetime.utcnow()
+            for symbol in batch:
+                if symbol in fetched:
+                    self._failed_at.pop(symbol, None)
+                elif recently_failed(symbol):
+                    # Only real failures back off; symbols skipped by an open circuit stay due
+                    self._failed_at[symbol] = now
+            written_at = StockCache.upsert_many(session, fetched)
+            universe_snapshot.update(fetched, {symbol: written_at for symbol in fetched})
+            logger.info(f"Cache warmer refreshed {len(fetched)}/{len(batch)} symbols")
+            return len(fetched)
+        except SQLAlchemyError as e:
+            logger.error(f"Database error in cache warmer: {str(e)}")
+            session.rollback()
+            return 0
+        finally:
+            session.close()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.warm_once()
+            except Exception as e:
+                logger.error(f"Error in cache warmer: {str(e)}")
+            self._stop.wait(self.interval_seconds)
+        # Hand the lease over straight away instead of letting it expire
+        session = SessionLocal()
+        try:
+            WorkerLease.release(session, LEASE_NAME, self.holder)
+        except SQLAlchemyError as e:
+            logger.error(f"Database error releasing the cache warmer lease: {str(e)}")
+        finally:
+            session.close()
+
+    def _priority_tiers(self) -> Dict[str, int]:
+        """Map each symbol to the first (highest priority) tier that lists it."""
+        tiers = {}
+        for rank, tier in enumerate(PRIORITY_TIERS):
+            for symbol in tier:
+                tiers.setdefault(symbol, rank)
+        return tiers
+
+# Create a global instance
+cache_warmer = CacheWarmer(
+    lead_hours=float(os.getenv('CACHE_WARMER_LEAD_HOURS', '2')),
+    batch_size=int(os.getenv('CACHE_WARMER_BATCH_SIZE', '10')),
+    interval_seconds=float(os.getenv('CACHE_WARMER_INTERVAL_SECONDS', '30'))
+)
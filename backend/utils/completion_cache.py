@@ -0,0 +1,72 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class CompletionCache:
+    """
+    Content-addressed cache of chat completions.
+    Keys hash the model, whitespace-normalized messages and temperature, so the same
+    question asked by different users maps to one entry. Entries expire after ttl_seconds;
+    the least recently used ones are evicted past max_entries or max_bytes of text.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600, max_entries: int = 1000, max_bytes: int = 8 * 1024 * 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model: str, messages: List[Dict[str, str]], temperature: float) -> str:
+        normalized = [
+            {'role': message.get('role', '').strip().lower(), 'content': ' '.join(message.get('content', '').split())}
+            for message in messages
+        ]
+        payload = json.dumps({'model': model, 'messages': normalized, 'temperature': float(temperature)}, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            content, expires_at = entry
+            if time.monotonic() > expires_at:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return content
+
+    def set(self, key: str, content: str) -> None:
+        size = len(content.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (content, time.monotonic() + self.ttl_seconds)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str) -> None:
+        content, _ = self._entries.pop(key)
+        self._bytes -= len(content.encode('utf-8'))
+
+# Create a global instance
+completion_cache = CompletionCache(
+    ttl_seconds=float(os.getenv('GROQ_CACHE_TTL_SECONDS', '3600')),
+    max_entries=int(os.getenv('GROQ_CACHE_MAX_ENTRIES', '1000')),
+    max_bytes=int(os.getenv('GROQ_CACHE_MAX_BYTES', str(8 * 1024 * 1024)))
+)
@@ -1,12 +1,38 @@
 import os
+import threading
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 DATABASE_URL = os.getenv('DATABASE_URL')
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# The engine (and its connection pool) is created on first use, so importing the app
+# does no database work and each worker builds its own pool after it has forked
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine() -> Engine:
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+    return _engine
+
+class _LazySessionmaker(sessionmaker):
+    """sessionmaker that binds to the engine the first time a session is opened."""
+
+    def __call__(self, **local_kw):
+        if self.kw.get('bind') is None:
+            self.configure(bind=get_engine())
+        return super().__call__(**local_kw)
+
+SessionLocal = _LazySessionmaker(autocommit=False, autoflush=False)
 Base = declarative_base()
 
 def init_db():
-    Base.metadata.create_all(bind=engine) 
\ No newline at end of file
+    # Import the models so their tables are registered on Base before create_all
+    import models.stock_cache  # noqa: F401
+    import models.symbol_suffix  # noqa: F401
+    import models.worker_lease  # noqa: F401
+    Base.metadata.create_all(bind=get_engine())
@@ -0,0 +1,14 @@
+from typing import Any, Dict, Iterable
+from flask import Response, request, stream_with_context
+
+def wants_event_stream(data: Dict[str, Any]) -> bool:
+    """True when the client opted into token streaming via {"stream": true} or Accept: text/event-stream."""
+    return bool(data.get('stream')) or request.accept_mimetypes.best == 'text/event-stream'
+
+def event_stream_response(events: Iterable[str]) -> Response:
+    """Wrap SSE events; closing the response on client disconnect closes the Groq stream too."""
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
@@ -0,0 +1,43 @@
+import logging
+from typing import Any
+import numpy as np
+from flask.json.provider import DefaultJSONProvider
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# orjson encodes several times faster than the stdlib (and NumPy arrays natively); optional
+try:
+    import orjson
+except ImportError:
+    logger.warning("orjson is not installed; using the standard json encoder")
+    orjson = None
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that encodes with orjson when it is installed.
+    NumPy arrays and scalars are accepted either way, so routes can hand over
+    column buffers without .tolist(). Anything orjson can't encode (or pretty
+    printing in debug mode) goes through the default provider.
+    """
+
+    @staticmethod
+    def default(o: Any) -> Any:
+        if isinstance(o, np.ndarray):
+            return o.tolist()
+        if isinstance(o, np.generic):
+            return o.item()
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is None or kwargs.get('indent') is not None:
+            return super().dumps(obj, **kwargs)
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            # Datetimes are passed through to default() so they keep Flask's HTTP-date format
+            return orjson.dumps(obj, default=kwargs.get('default', self.default), option=option).decode()
+        except TypeError:
+            return super().dumps(obj, **kwargs)
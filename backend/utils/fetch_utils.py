@@ -3,21 +3,21 @@ import pandas as pd
 from typing import Dict, List, Any
 import logging
 import time
-from functools import lru_cache
+from .ttl_cache import ttl_cache
 from .stock_scraper import get_all_stocks_with_sectors
+from .screening_engine import ColumnarSnapshot
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Cache stock data for 1 hour
-@lru_cache(maxsize=1)
+@ttl_cache(ttl_seconds=3600, max_entries=1, cache_if=bool)
 def get_cached_stocks():
     """Get cached list of all NSE and BSE stocks with sectors."""
     return get_all_stocks_with_sectors()
 
-@lru_cache(maxsize=1000, ttl=3600)  # Cache 1000 stocks for 1 hour
-# @lru_cache(maxsize=1000,)  # Cache 1000 stocks for 1 hour
+@ttl_cache(ttl_seconds=3600, max_entries=1000)  # Cache 1000 stocks for 1 hour
 def get_stock_info(ticker: str) -> Dict[str, Any]:
     """Fetch detailed financial information for a given stock ticker."""
     try:
@@ -87,85 +87,31 @@ def get_stock_info(ticker: str) -> Dict[str, Any]:
         logger.error(f"Error fetching data for {ticker}: {str(e)}")
         return None
 
+# Filters that cap a metric from above (stock value must be <= filter)
+MAX_CRITERIA = {
+    "pe", "pb", "ps", "peg", "enterpriseToEbitda", "debtToEquity", "payoutRatio",
+    "priceToCashFlow", "priceToFreeCashFlow", "beta"
+}
+
+# Filters that set a floor on a metric (stock value must be >= filter)
+MIN_CRITERIA = {
+    "roe", "roce", "roa", "operatingMargin", "profitMargin", "revenueGrowth", "earningsGrowth",
+    "cagr5Y", "marketCap", "currentRatio", "quickRatio", "interestCoverage", "dividendYield",
+    "dividendGrowth", "eps", "bookValuePerShare", "cashPerShare", "avgVolume"
+}
+
 def meets_criteria(stock_data: Dict[str, Any], filters: Dict[str, float]) -> bool:
     """Check if a stock meets all the specified filter criteria."""
     try:
         # Exchange filter
         if filters.get("exchange") and stock_data["exchange"] != filters["exchange"]:
             return False
-            
-        # Valuation Metrics
-        if filters.get("pe") and stock_data["pe"] > filters["pe"]:
-            return False
-        if filters.get("pb") and stock_data["pb"] > filters["pb"]:
-            return False
-        if filters.get("ps") and stock_data["ps"] > filters["ps"]:
-            return False
-        if filters.get("peg") and stock_data["peg"] > filters["peg"]:
-            return False
-        if filters.get("enterpriseToEbitda") and stock_data["enterpriseToEbitda"] > filters["enterpriseToEbitda"]:
-            return False
-            
-        # Profitability Metrics
-        if filters.get("roe") and stock_data["roe"] < filters["roe"]:
-            return False
-        if filters.get("roce") and stock_data["roce"] < filters["roce"]:
-            return False
-        if filters.get("roa") and stock_data["roa"] < filters["roa"]:
-            return False
-        if filters.get("operatingMargin") and stock_data["operatingMargin"] < filters["operatingMargin"]:
-            return False
-        if filters.get("profitMargin") and stock_data["profitMargin"] < filters["profitMargin"]:
-            return False
-            
-        # Growth Metrics
-        if filters.get("revenueGrowth") and stock_data["revenueGrowth"] < filters["revenueGrowth"]:
-            return False
-        if filters.get("earningsGrowth") and stock_data["earningsGrowth"] < filters["earningsGrowth"]:
-            return False
-        if filters.get("cagr5Y") and stock_data["cagr5Y"] < filters["cagr5Y"]:
-            return False
-            
-        # Financial Health
-        if filters.get("marketCap") and stock_data["marketCap"] < filters["marketCap"]:
-            return False
-        if filters.get("debtToEquity") and stock_data["debtToEquity"] > filters["debtToEquity"]:
-            return False
-        if filters.get("currentRatio") and stock_data["currentRatio"] < filters["currentRatio"]:
-            return False
-        if filters.get("quickRatio") and stock_data["quickRatio"] < filters["quickRatio"]:
-            return False
-        if filters.get("interestCoverage") and stock_data["interestCoverage"] < filters["interestCoverage"]:
-            return False
-            
-        # Dividend Metrics
-        if filters.get("dividendYield") and stock_data["dividendYield"] < filters["dividendYield"]:
-            return False
-        if filters.get("payoutRatio") and stock_data["payoutRatio"] > filters["payoutRatio"]:
-            return False
-        if filters.get("dividendGrowth") and stock_data["dividendGrowth"] < filters["dividendGrowth"]:
-            return False
-            
-        # Per Share Metrics
-        if filters.get("eps") and stock_data["eps"] < filters["eps"]:
-            return False
-        if filters.get("bookValuePerShare") and stock_data["bookValuePerShare"] < filters["bookValuePerShare"]:
-            return False
-        if filters.get("cashPerShare") and stock_data["cashPerShare"] < filters["cashPerShare"]:
-            return False
-            
-        # Price Information
-        if filters.get("priceToCashFlow") and stock_data["priceToCashFlow"] > filters["priceToCashFlow"]:
-            return False
-        if filters.get("priceToFreeCashFlow") and stock_data["priceToFreeCashFlow"] > filters["priceToFreeCashFlow"]:
-            return False
-            
-        # Volume and Liquidity
-        if filters.get("avgVolume") and stock_data["avgVolume"] < filters["avgVolume"]:
-            return False
-        if filters.get("beta") and stock_data["beta"] > filters["beta"]:
-            return False
-            
+        for key in MAX_CRITERIA:
+            if filters.get(key) and stock_data[key] > filters[key]:
+                return False
+        for key in MIN_CRITERIA:
+            if filters.get(key) and stock_data[key] < filters[key]:
+                return False
         return True
     except Exception as e:
         logger.error(f"Error checking criteria for {stock_data.get('symbol')}: {str(e)}")
@@ -186,11 +132,17 @@ def fetch_financial_ratios(filters: Dict[str, float]) -> List[Dict[str, Any]]:
         all_stocks = list(get_cached_stocks().keys())
         logger.info(f"Processing {len(all_stocks)} stocks")
         
-        results = []
+        snapshot = ColumnarSnapshot(MAX_CRITERIA | MIN_CRITERIA, MAX_CRITERIA, ignore_unknown=True)
         for ticker in all_stocks:
             stock_data = get_stock_info(ticker)
-            if stock_data and meets_criteria(stock_data, filters):
-                results.append(stock_data)
+            if stock_data:
+                snapshot.update({ticker: stock_data})
+
+        # Evaluate every criterion as a vectorized mask over the snapshot
+        selected = snapshot.mask(filters)
+        if filters.get("exchange"):
+            selected &= snapshot.exchanges == filters["exchange"]
+        results = [row for row, keep in zip(snapshot.screen({}), selected) if keep]
                 
         # Sort results by market cap (descending)
         results.sort(key=lambda x: x["marketCap"], reverse=True)
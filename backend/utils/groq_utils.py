@@ -0,0 +1,111 @@
+import json
+import logging
+import os
+from typing import Dict, Iterator, List
+from .completion_cache import completion_cache
+from .http_client import http_client
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+
+# Completions take far longer than scraped pages to come back, but a blocking call
+# has to finish inside gunicorn's worker timeout (30 s by default). For streams the
+# read timeout bounds the gap between chunks, not the whole answer.
+GROQ_TIMEOUT = (3.05, float(os.getenv('GROQ_READ_TIMEOUT', '25')))
+
+def chat_completion(api_key: str, model: str, messages: List[Dict[str, str]], temperature: float) -> str:
+    """
+    Return the completion text for messages, serving repeated prompts from the completion cache.
+    Raises requests.HTTPError when Groq answers with an error status.
+    """
+    key = completion_cache.key(model, messages, temperature)
+    cached = completion_cache.get(key)
+    if cached is not None:
+        logger.info(f"Groq completion cache hit for {model}")
+        return cached
+
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+    payload = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature
+    }
+    response = http_client.post(GROQ_API_URL, headers=headers, json=payload, timeout=GROQ_TIMEOUT)
+    response.raise_for_status()
+    content = response.json()["choices"][0]["message"]["content"]
+    completion_cache.set(key, content)
+    return content
+
+def stream_chat_completion(api_key: str, model: str, messages: List[Dict[str, str]], temperature: float) -> Iterator[str]:
+    """
+    Yield completion text incrementally as Groq generates it.
+    A cached completion is yielded as a single chunk, and a fully received stream is cached.
+    Closing the generator (e.g. the client disconnected) closes the upstream connection.
+    """
+    key = completion_cache.key(model, messages, temperature)
+    cached = completion_cache.get(key)
+    if cached is not None:
+        logger.info(f"Groq completion cache hit for {model}")
+        yield cached
+        return
+
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+    payload = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "stream": True
+    }
+    response = http_client.post(GROQ_API_URL, headers=headers, json=payload, stream=True, timeout=GROQ_TIMEOUT)
+    if not response.ok:
+        # Read the error body before closing, so the caller can still report e.response.text
+        response.content
+        response.close()
+        response.raise_for_status()
+    try:
+        parts = []
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith('data:'):
+                continue
+            data = line[len('data:'):].strip()
+            if data == '[DONE]':
+                completion_cache.set(key, ''.join(parts))
+                break
+            delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+            if delta:
+                parts.append(delta)
+                yield delta
+    finally:
+        response.close()
+
+def sse_relay(chunks: Iterator[str]) -> Iterator[str]:
+    """
+    Encode text chunks as server-sent 'token' events, ending with 'done' (or 'error').
+    The first chunk is pulled before returning so Groq errors raise here, while the
+    route can still answer with a proper status code.
+    """
+    first = next(chunks, None)
+
+    def events():
+        try:
+            if first is not None:
+                yield f"event: token\ndata: {json.dumps({'token': first})}\n\n"
+            for chunk in chunks:
+                yield f"event: token\ndata: {json.dumps({'token': chunk})}\n\n"
+            yield "event: done\ndata: {}\n\n"
+        except Exception as e:
+            logger.error(f"Error while streaming Groq completion: {str(e)}")
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+        finally:
+            chunks.close()
+
+    return events()
@@ -0,0 +1,72 @@
+import importlib.util
+import logging
+from typing import TYPE_CHECKING, Optional, Sequence
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# lxml's C parser and XPath do the bulk of the work; html.parser + SoupStrainer is the fallback.
+# bs4 and lxml are imported on the first parse, not when the app is imported.
+if importlib.util.find_spec('lxml') is not None:
+    HTML_PARSER = 'lxml'
+else:
+    logger.warning("lxml is not installed; falling back to html.parser")
+    HTML_PARSER = 'html.parser'
+
+class PageSection:
+    """The elements of a page a parser actually reads: a tag with any of the given classes."""
+
+    def __init__(self, tag: str, classes: Sequence[str]):
+        self.tag = tag
+        self.classes = list(classes)
+        self._strainer = None
+        self.xpath = ' | '.join(
+            f"//{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {css_class} ')]"
+            for css_class in self.classes
+        )
+
+    @property
+    def strainer(self):
+        if self._strainer is None:
+            from bs4 import SoupStrainer
+            # During restricted parsing class is still the raw attribute string, so split it here
+            wanted = set(self.classes)
+            self._strainer = SoupStrainer(self.tag, class_=lambda value: bool(value) and not wanted.isdisjoint(value.split()))
+        return self._strainer
+
+# Only these sections are built from the large source pages
+MONEYCONTROL_TABLES = PageSection('table', ['mctable1'])
+SCREENER_TABLES = PageSection('table', ['data-table'])
+SCREENER_COMPANY = PageSection('div', ['company-header', 'company-ratios'])
+LISTING_TABLE = PageSection('table', ['table'])
+
+def parse_html(markup: str, only: Optional[PageSection] = None) -> 'BeautifulSoup':
+    """
+    Parse markup into a BeautifulSoup tree holding only the `only` section (or everything).
+    With lxml the page is parsed in C and just the matching elements are handed to
+    BeautifulSoup, so the Python-side tree stays a few tables in size.
+    """
+    from bs4 import BeautifulSoup
+    if only is None:
+        return BeautifulSoup(markup, HTML_PARSER)
+    if HTML_PARSER != 'lxml':
+        return BeautifulSoup(markup, HTML_PARSER, parse_only=only.strainer)
+
+    import lxml.html
+    try:
+        root = lxml.html.fromstring(markup)
+    except Exception as e:
+        # Empty or badly broken documents: let BeautifulSoup do what it can
+        logger.warning(f"lxml could not parse page ({str(e)}); using html.parser")
+        return BeautifulSoup(markup, 'html.parser', parse_only=only.strainer)
+
+    matches = root.xpath(only.xpath)
+    matched = set(matches)
+    # A match nested in another match is already part of its ancestor's markup
+    outermost = [el for el in matches if not any(parent in matched for parent in el.iterancestors())]
+    fragment = ''.join(lxml.html.tostring(el, encoding='unicode', with_tail=False) for el in outermost)
+    return BeautifulSoup(fragment, HTML_PARSER)
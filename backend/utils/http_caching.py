@@ -0,0 +1,70 @@
+import gzip
+import hashlib
+import logging
+import os
+from datetime import datetime
+from typing import Any, Optional
+from flask import Response, request
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Bodies smaller than this aren't worth the gzip header and CPU
+COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', '500'))
+COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', '6'))
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript'}
+
+def compress_response(response: Response) -> Response:
+    """
+    after_request hook: gzip buffered text/JSON bodies when the client accepts it.
+    Streamed responses (SSE / NDJSON) are left alone so their records still arrive one by one.
+    """
+    try:
+        response.vary.add('Accept-Encoding')
+        if (response.direct_passthrough or response.is_streamed
+                or response.status_code < 200 or response.status_code >= 300
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES
+                or 'gzip' not in request.accept_encodings):
+            return response
+
+        body = response.get_data()
+        if len(body) < COMPRESS_MIN_BYTES:
+            return response
+        response.set_data(gzip.compress(body, compresslevel=COMPRESS_LEVEL))
+        response.headers['Content-Encoding'] = 'gzip'
+        # The ETag names the data, not the bytes, so it stays weak across encodings
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+    except Exception as e:
+        logger.error(f"Error compressing response: {str(e)}")
+    return response
+
+def version_etag(*parts: Any) -> str:
+    """A stable tag for whatever versions the body was built from (not the body itself)."""
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:32]
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None) -> Optional[Response]:
+    """
+    The 304 response for a GET whose If-None-Match / If-Modified-Since still match, else None.
+    Checked before the body is built, so a revalidation costs no JSON encoding.
+    """
+    if request.if_none_match:
+        matched = request.if_none_match.contains_weak(etag)
+    elif request.if_modified_since and last_modified is not None:
+        matched = last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+    else:
+        matched = False
+    if not matched:
+        return None
+    return with_validators(Response(status=304), etag, last_modified)
+
+def with_validators(response: Response, etag: str, last_modified: Optional[datetime] = None) -> Response:
+    """Attach ETag / Last-Modified and ask clients to revalidate instead of reusing blindly."""
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
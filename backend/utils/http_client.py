@@ -0,0 +1,103 @@
+import logging
+import os
+import random
+import time
+from typing import Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# (connect, read) timeouts in seconds applied when a caller doesn't pass its own
+DEFAULT_TIMEOUT = (
+    float(os.getenv('HTTP_CONNECT_TIMEOUT', '3.05')),
+    float(os.getenv('HTTP_READ_TIMEOUT', '10'))
+)
+
+# Statuses worth another attempt: throttling and transient upstream failures
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Methods safe to repeat after the server may have seen them
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+class HTTPClient:
+    """
+    One pooled requests.Session shared by every upstream fetcher.
+    Connections are kept alive per host, every call gets connect/read timeouts,
+    and connection errors, timeouts and RETRY_STATUSES are retried a bounded number
+    of times with full-jitter exponential backoff (honouring Retry-After).
+    Non-idempotent requests (POST, e.g. billed Groq completions) are only retried when
+    they never reached the server (connect failures) or were rejected with 429.
+    """
+
+    def __init__(self, timeout: Tuple[float, float] = DEFAULT_TIMEOUT, max_retries: int = 2,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 pool_connections: int = 16, pool_maxsize: int = 32):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.session = requests.Session()
+        # Retries are handled in request() so they can be jittered and logged
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers['Accept-Encoding'] = 'gzip, deflate'
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def request(self, method: str, url: str, retries: Optional[int] = None, **kwargs) -> requests.Response:
+        """
+        Send a request through the shared pool.
+        Returns the last response once retries are exhausted (callers still call
+        raise_for_status); re-raises the last connection error or timeout.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        retries = self.max_retries if retries is None else retries
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        retry_statuses = RETRY_STATUSES if idempotent else {429}
+        for attempt in range(retries + 1):
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == retries or not (idempotent or _never_sent(e)):
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"{method} {url} failed ({str(e)}); retrying in {delay:.2f}s")
+            else:
+                if response.status_code not in retry_statuses or attempt == retries:
+                    return response
+                delay = self._retry_after(response) or self._backoff(attempt)
+                logger.warning(f"{method} {url} returned {response.status_code}; retrying in {delay:.2f}s")
+                response.close()
+            time.sleep(delay)
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _retry_after(self, response: requests.Response) -> Optional[float]:
+        try:
+            return min(self.backoff_max, float(response.headers['Retry-After']))
+        except (KeyError, ValueError):
+            return None
+
+def _never_sent(error: Exception) -> bool:
+    """True when the request failed before any of it reached the server."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+# Create a global instance
+http_client = HTTPClient(
+    max_retries=int(os.getenv('HTTP_MAX_RETRIES', '2')),
+    pool_maxsize=int(os.getenv('HTTP_POOL_MAXSIZE', '32'))
+)
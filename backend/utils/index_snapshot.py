@@ -0,0 +1,105 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+from .index_list import index_symbols
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class IndexSnapshot:
+    """
+    Short-TTL shared quote snapshot for the market indices.
+    All symbols are fetched with one batched yfinance download. Only one caller
+    refreshes at a time: callers that already have a snapshot get it (marked stale)
+    instead of waiting, and after a failed refresh no new attempt is made for
+    retry_seconds, so an upstream outage costs one download per retry window.
+    """
+
+    def __init__(self, symbols: Dict[str, str], ttl_seconds: float = 60, retry_seconds: float = 30):
+        self.symbols = symbols
+        self.ttl_seconds = ttl_seconds
+        self.retry_seconds = retry_seconds
+        self._lock = threading.Lock()
+        # (prices, as_of, fetched_at) swapped in as one tuple so readers never see a mix
+        self._current: Optional[Tuple[Dict[str, Any], datetime, float]] = None
+        self._failed_at: Optional[float] = None
+
+    def get(self) -> Dict[str, Any]:
+        """
+        Return {'prices', 'as_of', 'age_seconds', 'stale'}, refreshing at most once per TTL.
+        Raises RuntimeError when there has never been a successful refresh.
+        """
+        if self._needs_refresh():
+            if self._current is None:
+                # Nothing to serve yet, so wait for the refresh in progress
+                with self._lock:
+                    if self._needs_refresh():
+                        self._refresh()
+            elif self._lock.acquire(blocking=False):
+                try:
+                    if self._needs_refresh():
+                        self._refresh()
+                finally:
+                    self._lock.release()
+
+        current = self._current
+        if current is None:
+            raise RuntimeError("Index prices are not available yet")
+        prices, as_of, fetched_at = current
+
+        age = time.monotonic() - fetched_at
+        return {
+            'prices': prices,
+            'as_of': as_of.isoformat() + 'Z',
+            'age_seconds': round(age, 1),
+            'stale': age > self.ttl_seconds
+        }
+
+    def _needs_refresh(self) -> bool:
+        now = time.monotonic()
+        current = self._current
+        if current is not None and now - current[2] < self.ttl_seconds:
+            return False
+        # Back off after a failure instead of retrying on every request
+        return self._failed_at is None or now - self._failed_at >= self.retry_seconds
+
+    def _refresh(self) -> None:
+        try:
+            prices = self._fetch_prices()
+            self._current = (prices, datetime.utcnow(), time.monotonic())
+            self._failed_at = None
+        except Exception as e:
+            # Keep serving the last snapshot (marked stale) if we have one
+            logger.error(f"Error refreshing index snapshot: {str(e)}")
+            self._failed_at = time.monotonic()
+
+    def _fetch_prices(self) -> Dict[str, Any]:
+        # yfinance (and pandas with it) is slow to import; load it on first refresh, not at boot
+        import yfinance as yf
+        tickers = list(self.symbols.values())
+        frame = yf.download(
+            tickers, period='5d', interval='1d', group_by='ticker',
+            threads=True, progress=False, auto_adjust=False
+        )
+        prices = {}
+        for symbol in tickers:
+            try:
+                closes = frame[symbol]['Close'].dropna()
+                prices[symbol] = float(closes.iloc[-1]) if not closes.empty else None
+            except KeyError:
+                prices[symbol] = None
+        # yfinance reports network errors and rate limits as an empty frame
+        if all(price is None for price in prices.values()):
+            raise RuntimeError("yfinance returned no index prices")
+        return prices
+
+# Create a global instance
+index_snapshot = IndexSnapshot(
+    index_symbols,
+    ttl_seconds=float(os.getenv('INDEX_SNAPSHOT_TTL_SECONDS', '60')),
+    retry_seconds=float(os.getenv('INDEX_SNAPSHOT_RETRY_SECONDS', '30'))
+)
@@ -1,14 +1,23 @@
-import requests
-from bs4 import BeautifulSoup
 import logging
-from typing import Dict, Any
-from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Any
+from .http_client import http_client
+from .ttl_cache import ttl_cache
+from .html_parsing import parse_html, MONEYCONTROL_TABLES
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class MoneycontrolFetcher:
+    # Every parser only reads the mctable1 tables, so nothing else is built
+    page_strainers = {
+        '_parse_mini_statement': MONEYCONTROL_TABLES,
+        '_parse_financial_table': MONEYCONTROL_TABLES,
+    }
+
     def __init__(self):
         self.base_url = "https://www.moneycontrol.com"
         self.headers = {
@@ -17,89 +26,73 @@ class MoneycontrolFetcher:
             "Accept-Language": "en-US,en;q=0.5",
         }
 
-    @lru_cache(maxsize=1000)
+    # Several statements come from the same page (balance-sheetVI feeds the mini statement
+    # and the balance sheet); the page's tables are downloaded and parsed once for all of them
+    @ttl_cache(ttl_seconds=600, max_entries=200, method=True, cache_if=bool)
+    def _get_page(self, symbol: str, page: str) -> 'BeautifulSoup':
+        response = http_client.get(f"{self.base_url}/financials/{symbol}/{page}", headers=self.headers)
+        response.raise_for_status()
+        return parse_html(response.text, MONEYCONTROL_TABLES)
+
+    @ttl_cache(ttl_seconds=86400, max_entries=1000, method=True)
     def get_mini_statement(self, symbol: str) -> Dict[str, Any]:
         """Get mini financial statement for a symbol."""
         try:
-            url = f"{self.base_url}/financials/{symbol}/balance-sheetVI"
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Extract key metrics
-            metrics = {}
-            table = soup.find('table', {'class': 'mctable1'})
-            if table:
-                for row in table.find_all('tr'):
-                    cols = row.find_all('td')
-                    if len(cols) >= 2:
-                        key = cols[0].text.strip().lower().replace(' ', '_')
-                        value = cols[1].text.strip()
-                        metrics[key] = self._parse_value(value)
-            
-            return metrics
+            return self._parse_mini_statement(self._get_page(symbol, 'balance-sheetVI'))
         except Exception as e:
             logger.error(f"Error fetching mini statement for {symbol}: {str(e)}")
             return None
 
-    @lru_cache(maxsize=1000)
+    @ttl_cache(ttl_seconds=86400, max_entries=1000, method=True)
     def get_balance_sheet(self, symbol: str) -> Dict[str, Any]:
         """Get complete balance sheet for a symbol."""
         try:
-            url = f"{self.base_url}/financials/{symbol}/balance-sheetVI"
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            return self._parse_financial_table(soup)
+            return self._parse_financial_table(self._get_page(symbol, 'balance-sheetVI'))
         except Exception as e:
             logger.error(f"Error fetching balance sheet for {symbol}: {str(e)}")
             return None
 
-    @lru_cache(maxsize=1000)
+    @ttl_cache(ttl_seconds=86400, max_entries=1000, method=True)
     def get_income_statement(self, symbol: str) -> Dict[str, Any]:
         """Get income statement for a symbol."""
         try:
-            url = f"{self.base_url}/financials/{symbol}/profit-lossVI"
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            return self._parse_financial_table(soup)
+            return self._parse_financial_table(self._get_page(symbol, 'profit-lossVI'))
         except Exception as e:
             logger.error(f"Error fetching income statement for {symbol}: {str(e)}")
             return None
 
-    @lru_cache(maxsize=1000)
+    @ttl_cache(ttl_seconds=86400, max_entries=1000, method=True)
     def get_cash_flow(self, symbol: str) -> Dict[str, Any]:
         """Get cash flow statement for a symbol."""
         try:
-            url = f"{self.base_url}/financials/{symbol}/cash-flowVI"
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            return self._parse_financial_table(soup)
+            return self._parse_financial_table(self._get_page(symbol, 'cash-flowVI'))
         except Exception as e:
             logger.error(f"Error fetching cash flow for {symbol}: {str(e)}")
             return None
 
-    @lru_cache(maxsize=1000)
+    @ttl_cache(ttl_seconds=86400, max_entries=1000, method=True)
     def get_ratios(self, symbol: str) -> Dict[str, Any]:
         """Get key financial ratios for a symbol."""
         try:
-            url = f"{self.base_url}/financials/{symbol}/ratiosVI"
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            return self._parse_financial_table(soup)
+            return self._parse_financial_table(self._get_page(symbol, 'ratiosVI'))
         except Exception as e:
             logger.error(f"Error fetching ratios for {symbol}: {str(e)}")
             return None
 
-    def _parse_financial_table(self, soup: BeautifulSoup) -> Dict[str, Any]:
+    def _parse_mini_statement(self, soup: 'BeautifulSoup') -> Dict[str, Any]:
+        """Parse the latest value of each line item from the first Moneycontrol table."""
+        metrics = {}
+        table = soup.find('table', {'class': 'mctable1'})
+        if table:
+            for row in table.find_all('tr'):
+                cols = row.find_all('td')
+                if len(cols) >= 2:
+                    key = cols[0].text.strip().lower().replace(' ', '_')
+                    value = cols[1].text.strip()
+                    metrics[key] = self._parse_value(value)
+        return metrics
+
+    def _parse_financial_table(self, soup: 'BeautifulSoup') -> Dict[str, Any]:
         """Parse financial data table from Moneycontrol."""
         data = {}
         tables = soup.find_all('table', {'class': 'mctable1'})
@@ -1,9 +1,7 @@
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
 import logging
 from typing import Dict, Any, List
-from functools import lru_cache
+from .http_client import http_client
+from .ttl_cache import ttl_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -18,80 +16,85 @@ class NSEFetcher:
             "Accept-Language": "en-US,en;q=0.5",
         }
 
-    @lru_cache(maxsize=1000)
+    @ttl_cache(ttl_seconds=60, max_entries=1000, method=True)
     def get_ohlc(self, symbol: str) -> Dict[str, Any]:
         """Get OHLC data for a symbol."""
         try:
             url = f"{self.base_url}/api/quote-equity?symbol={symbol}"
-            response = requests.get(url, headers=self.headers)
+            response = http_client.get(url, headers=self.headers)
             response.raise_for_status()
-            data = response.json()
-            
-            return {
-                "last_price": data.get("priceInfo", {}).get("lastPrice", 0),
-                "high": data.get("priceInfo", {}).get("intraDayHighLow", {}).get("max", 0),
-                "low": data.get("priceInfo", {}).get("intraDayHighLow", {}).get("min", 0),
-                "open": data.get("priceInfo", {}).get("open", 0),
-                "close": data.get("priceInfo", {}).get("close", 0),
-                "volume": data.get("priceInfo", {}).get("totalTradedVolume", 0),
-                "last_traded_time": data.get("priceInfo", {}).get("lastUpdateTime", "")
-            }
+            return self._parse_ohlc(response.json())
         except Exception as e:
             logger.error(f"Error fetching OHLC for {symbol}: {str(e)}")
             return None
 
-    @lru_cache(maxsize=1000)
+    @ttl_cache(ttl_seconds=60, max_entries=1000, method=True)
     def get_option_chain(self, symbol: str) -> Dict[str, Any]:
         """Get option chain data for a symbol."""
         try:
             url = f"{self.base_url}/api/option-chain-equities?symbol={symbol}"
-            response = requests.get(url, headers=self.headers)
+            response = http_client.get(url, headers=self.headers)
             response.raise_for_status()
             return response.json()
         except Exception as e:
             logger.error(f"Error fetching option chain for {symbol}: {str(e)}")
             return None
 
-    @lru_cache(maxsize=1000)
+    @ttl_cache(ttl_seconds=900, max_entries=1000, method=True)
     def get_technical_indicators(self, symbol: str) -> Dict[str, Any]:
         """Get technical indicators for a symbol."""
         try:
             url = f"{self.base_url}/api/technical-indicators?symbol={symbol}"
-            response = requests.get(url, headers=self.headers)
+            response = http_client.get(url, headers=self.headers)
             response.raise_for_status()
             return response.json()
         except Exception as e:
             logger.error(f"Error fetching technical indicators for {symbol}: {str(e)}")
             return None
 
-    @lru_cache(maxsize=1000)
+    @ttl_cache(ttl_seconds=86400, max_entries=1000, method=True)
     def get_corporate_info(self, symbol: str) -> Dict[str, Any]:
         """Get corporate information for a symbol."""
         try:
             url = f"{self.base_url}/api/quote-equity?symbol={symbol}"
-            response = requests.get(url, headers=self.headers)
+            response = http_client.get(url, headers=self.headers)
             response.raise_for_status()
-            data = response.json()
-            
-            return {
-                "company_name": data.get("info", {}).get("companyName", ""),
-                "industry": data.get("info", {}).get("industry", ""),
-                "sector": data.get("info", {}).get("sector", ""),
-                "isin": data.get("info", {}).get("isin", ""),
-                "market_cap": data.get("priceInfo", {}).get("marketCap", 0),
-                "face_value": data.get("securityInfo", {}).get("faceValue", 0),
-                "book_value": data.get("priceInfo", {}).get("bookValue", 0),
-                "dividend_yield": data.get("priceInfo", {}).get("dividendYield", 0)
-            }
+            return self._parse_corporate_info(response.json())
         except Exception as e:
             logger.error(f"Error fetching corporate info for {symbol}: {str(e)}")
             return None
 
+    def _parse_ohlc(self, data: Dict) -> Dict[str, Any]:
+        """Parse OHLC fields from an NSE quote-equity response."""
+        return {
+            "last_price": data.get("priceInfo", {}).get("lastPrice", 0),
+            "high": data.get("priceInfo", {}).get("intraDayHighLow", {}).get("max", 0),
+            "low": data.get("priceInfo", {}).get("intraDayHighLow", {}).get("min", 0),
+            "open": data.get("priceInfo", {}).get("open", 0),
+            "close": data.get("priceInfo", {}).get("close", 0),
+            "volume": data.get("priceInfo", {}).get("totalTradedVolume", 0),
+            "last_traded_time": data.get("priceInfo", {}).get("lastUpdateTime", "")
+        }
+
+    def _parse_corporate_info(self, data: Dict) -> Dict[str, Any]:
+        """Parse corporate fields from an NSE quote-equity response."""
+        return {
+            "company_name": data.get("info", {}).get("companyName", ""),
+            "industry": data.get("info", {}).get("industry", ""),
+            "sector": data.get("info", {}).get("sector", ""),
+            "isin": data.get("info", {}).get("isin", ""),
+            "market_cap": data.get("priceInfo", {}).get("marketCap", 0),
+            "face_value": data.get("securityInfo", {}).get("faceValue", 0),
+            "book_value": data.get("priceInfo", {}).get("bookValue", 0),
+            "dividend_yield": data.get("priceInfo", {}).get("dividendYield", 0)
+        }
+
     def get_all_stocks(self) -> List[str]:
         """Get list of all NSE stocks."""
+        from bs4 import BeautifulSoup
         try:
             url = f"{self.base_url}/market-data/securities-available-for-trading"
-            response = requests.get(url, headers=self.headers)
+            response = http_client.get(url, headers=self.headers)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.text, 'html.parser')
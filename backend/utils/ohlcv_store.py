@@ -0,0 +1,204 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import quote
+import numpy as np
+from .single_flight import SingleFlight
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+STORE_DIR = os.getenv(
+    'OHLCV_STORE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'ohlcv')
+)
+
+# Don't ask upstream for a delta more often than this per symbol and interval
+MIN_REFRESH_SECONDS = int(os.getenv('OHLCV_MIN_REFRESH_SECONDS', '900'))
+
+# Dates are stored as days since the Unix epoch
+BAR_DTYPE = np.dtype([
+    ('date', '<i4'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<i8'),
+])
+
+# Calendar days covered by each yfinance period we serve
+PERIOD_DAYS = {
+    '5d': 10,
+    '1wk': 7,
+    '1mo': 31,
+    '6mo': 183,
+    '1y': 366,
+    '5y': 1827,
+}
+
+# Periods counted in bars rather than calendar days
+PERIOD_BARS = {
+    '5d': 5,
+}
+
+EPOCH = date(1970, 1, 1)
+
+class OHLCVStore:
+    """
+    On-disk OHLCV time series keyed by (symbol, interval).
+    Each series is a structured NumPy array saved as .npy and read back memory-mapped,
+    with a small JSON sidecar recording how far back it is complete and when upstream
+    was last checked. Reads only go upstream for bars after the last stored date.
+    Bars are split- and dividend-adjusted, so a delta that contains a corporate action
+    after the last one already applied (meta['adjusted_through']) triggers a refetch of
+    the whole stored window onto the new adjustment basis.
+    """
+
+    def __init__(self, root: str = STORE_DIR, min_refresh_seconds: int = MIN_REFRESH_SECONDS):
+        self.root = root
+        self.min_refresh_seconds = min_refresh_seconds
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._flights = SingleFlight()
+
+    def get(self, symbol: str, interval: str, period: str) -> np.ndarray:
+        """
+        Return the bars for period, fetching the full window or only the newest bars as needed.
+        Concurrent requests for the same series share one read/fetch.
+        """
+        return self._flights.do((symbol, interval, period), self._get, symbol, interval, period)
+
+    def _get(self, symbol: str, interval: str, period: str) -> np.ndarray:
+        start_day = _today() - PERIOD_DAYS.get(period, PERIOD_DAYS['1mo'])
+        with self._lock_for(symbol, interval):
+            bars, meta = self._load(symbol, interval)
+            if bars is None or meta.get('covered_from', start_day + 1) > start_day:
+                fetched, last_action = self._fetch(symbol, interval, period=period)
+                if len(fetched):
+                    bars = fetched
+                    meta = {'covered_from': start_day}
+                    if last_action is not None:
+                        meta['adjusted_through'] = last_action
+                    self._save(symbol, interval, bars, meta)
+            elif time.time() - meta.get('checked_at', 0) > self.min_refresh_seconds:
+                bars = self._refresh(symbol, interval, bars, meta)
+
+        if bars is None:
+            return np.empty(0, dtype=BAR_DTYPE)
+        if period in PERIOD_BARS:
+            return bars[-PERIOD_BARS[period]:]
+        return bars[bars['date'] >= start_day]
+
+    def _refresh(self, symbol: str, interval: str, bars: np.ndarray, meta: Dict[str, Any]) -> np.ndarray:
+        """Fetch bars from the last stored date on; the last bar may still be forming, so it is replaced."""
+        last_day = int(bars['date'][-1])
+        try:
+            delta, last_action = self._fetch(symbol, interval, start=EPOCH + timedelta(days=last_day))
+            # The delta starts at the last stored bar, so an action on it shows up on every
+            # refresh; only one newer than the stored adjustment basis needs a refetch
+            if last_action is not None and last_action > meta.get('adjusted_through', -1):
+                # A split or dividend re-bases every earlier adjusted price; refetch what we hold
+                first_day = min(int(bars['date'][0]), meta.get('covered_from', int(bars['date'][0])))
+                logger.info(f"Corporate action in {symbol} {interval}; refetching stored window")
+                refetched, refetched_action = self._fetch(symbol, interval, start=EPOCH + timedelta(days=first_day))
+                if len(refetched):
+                    meta = dict(meta, adjusted_through=max(last_action, refetched_action or last_action))
+                    self._save(symbol, interval, refetched, meta)
+                    return refetched
+        except Exception as e:
+            # Stored bars are still good; serve them and try again next time
+            logger.error(f"Error fetching OHLCV delta for {symbol} {interval}: {str(e)}")
+            return bars
+        if len(delta):
+            bars = np.concatenate([bars[bars['date'] < delta['date'][0]], delta])
+        self._save(symbol, interval, bars, meta)
+        return bars
+
+    def _fetch(self, symbol: str, interval: str, **window) -> Tuple[np.ndarray, Optional[int]]:
+        """Adjusted bars for the window, and the date (epoch day) of its latest split or dividend, if any."""
+        # yfinance (and pandas with it) is slow to import; load it on first fetch, not at boot
+        import yfinance as yf
+        from yfinance.exceptions import YFPricesMissingError, YFTickerMissingError, YFTzMissingError
+        try:
+            # raise_errors surfaces network errors and rate limits instead of an empty frame
+            hist = yf.Ticker(symbol).history(interval=interval, auto_adjust=True, actions=True,
+                                             raise_errors=True, **window)
+        except (YFPricesMissingError, YFTickerMissingError, YFTzMissingError):
+            # Upstream answered: there is no data for this ticker and window
+            return np.empty(0, dtype=BAR_DTYPE), None
+        if hist.empty:
+            return np.empty(0, dtype=BAR_DTYPE), None
+        bars = np.empty(len(hist), dtype=BAR_DTYPE)
+        bars['date'] = np.array(hist.index.strftime('%Y-%m-%d'), dtype='datetime64[D]').astype('int64')
+        bars['open'] = hist['Open'].to_numpy()
+        bars['high'] = hist['High'].to_numpy()
+        bars['low'] = hist['Low'].to_numpy()
+        bars['close'] = hist['Close'].to_numpy()
+        bars['volume'] = hist['Volume'].fillna(0).to_numpy()
+        actions = np.zeros(len(hist), dtype=bool)
+        for column in ('Dividends', 'Stock Splits'):
+            if column in hist:
+                actions |= (hist[column].fillna(0) != 0).to_numpy()
+        last_action = int(bars['date'][actions][-1]) if actions.any() else None
+        return bars, last_action
+
+    def _load(self, symbol: str, interval: str) -> Tuple[Optional[np.ndarray], Dict[str, Any]]:
+        path = self._path(symbol, interval)
+        try:
+            with open(path + '.json') as f:
+                meta = json.load(f)
+            return np.load(path + '.npy', mmap_mode='r'), meta
+        except FileNotFoundError:
+            return None, {}
+        except Exception as e:
+            logger.error(f"Error reading OHLCV store for {symbol} {interval}: {str(e)}")
+            return None, {}
+
+    def _save(self, symbol: str, interval: str, bars: np.ndarray, meta: Dict[str, Any]) -> None:
+        path = self._path(symbol, interval)
+        meta = dict(meta, checked_at=time.time())
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Bars first, sidecar last: a reader between the two renames sees new bars with
+            # the old (narrower, older) metadata, which at worst triggers one extra refresh
+            _replace_atomically(path + '.npy', lambda f: np.save(f, np.ascontiguousarray(bars)))
+            _replace_atomically(path + '.json', lambda f: f.write(json.dumps(meta).encode()))
+        except OSError as e:
+            logger.error(f"Error writing OHLCV store for {symbol} {interval}: {str(e)}")
+
+    def _path(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, interval, quote(symbol, safe=''))
+
+    def _lock_for(self, symbol: str, interval: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault((symbol, interval), threading.Lock())
+
+def _replace_atomically(path: str, write) -> None:
+    """
+    Write through a uniquely named temp file in the same directory and rename it over path,
+    so concurrent writers (other workers, a release step) never share a temp file.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+def _today() -> int:
+    return (date.today() - EPOCH).days
+
+def bar_dates(bars: np.ndarray) -> np.ndarray:
+    """Convert stored epoch-day dates to 'YYYY-MM-DD' strings."""
+    return np.datetime_as_string(bars['date'].astype('datetime64[D]'), unit='D')
+
+# Create a global instance
+ohlcv_store = OHLCVStore()
@@ -1,45 +1,87 @@
+from __future__ import annotations
+
 import os
-from typing import List, Dict, Any
-import pandas as pd
-import requests
+import json
+from typing import TYPE_CHECKING, List, Dict, Any, Iterator, Optional, Tuple
+import numpy as np
 from dotenv import load_dotenv
+from .groq_utils import chat_completion, stream_chat_completion
+
+# pandas is only needed once a chart is analysed; keep it off the worker's import path
+if TYPE_CHECKING:
+    import pandas as pd
 
 load_dotenv()
 
 GROQ_API_KEY = os.getenv('GROQ_API_KEY')
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
 GROQ_MODEL = "llama2-70b-4096"
 
+# Upper bound on the price-data section of chart prompts, in (estimated) tokens
+PROMPT_TOKEN_BUDGET = int(os.getenv('GROQ_PROMPT_TOKEN_BUDGET', '1500'))
+
+# Rough characters per token for English/numeric text
+CHARS_PER_TOKEN = 4
+
+# Coarser and coarser bars tried until the OHLC table fits its share of the budget
+RESAMPLE_RULES = [('W', 'weekly'), ('MS', 'monthly'), ('QS', 'quarterly')]
+
+# Tolerances are fractions of price
+PEAK_TOLERANCE = 0.03       # matching peaks/shoulders must be this close
+MIN_PROMINENCE = 0.03       # head over shoulders, trough under double-top peaks
+FLAT_SLOPE = 0.02           # total drift across a triangle that still counts as flat
+POLE_BARS = 10              # bars over which a flag pole is measured
+MIN_POLE_MOVE = 0.08        # minimum pole move for a flag
+FLAG_BARS = (5, 15)         # consolidation length for a flag
+MAX_FLAG_RETRACE = 0.5      # flag range as a fraction of the pole height
+TRIANGLE_PIVOTS = 4         # trailing swing highs/lows fitted for triangles
+ATR_BARS = 14               # bars in the average true range (from closes) patterns are measured against
+# A random walk drifts about ATR * sqrt(bars) over a window, so a pattern's height must
+# beat that by this factor to stand out from noise
+MIN_ATR_MULTIPLE = 1.75
+
+IMPLICATIONS = {
+    'Head and Shoulders': ('bearish', 'Potential reversal of the prior uptrend on a close below the neckline.'),
+    'Inverse Head and Shoulders': ('bullish', 'Potential reversal of the prior downtrend on a close above the neckline.'),
+    'Double Top': ('bearish', 'Resistance held twice; a break below the middle trough confirms a reversal.'),
+    'Double Bottom': ('bullish', 'Support held twice; a break above the middle peak confirms a reversal.'),
+    'Ascending Triangle': ('bullish', 'Rising lows against flat resistance; breakouts usually resolve upward.'),
+    'Descending Triangle': ('bearish', 'Falling highs against flat support; breakdowns usually resolve downward.'),
+    'Symmetrical Triangle': ('neutral', 'Converging highs and lows; expect a breakout in either direction.'),
+    'Bull Flag': ('bullish', 'Shallow consolidation after a sharp rise; continuation higher is likely.'),
+    'Bear Flag': ('bearish', 'Shallow consolidation after a sharp drop; continuation lower is likely.'),
+}
+
 class PatternRecognizer:
-    def __init__(self):
-        pass
+    def __init__(self, token_budget: int = PROMPT_TOKEN_BUDGET):
+        self.token_budget = token_budget
 
     def detect_patterns(self, data: pd.DataFrame) -> List[Dict[str, Any]]:
-        data_str = data.to_string()
+        """Detect chart patterns locally from the price and volume columns of data."""
+        dates, close, volume = _price_arrays(data)
+        return detect_chart_patterns(dates, close, volume)
+
+    def describe_patterns(self, patterns: List[Dict[str, Any]], query: str) -> str:
+        """Optional LLM narrative over already-detected patterns."""
         prompt = f"""
-        Analyze the following stock price data and identify any technical patterns:
-        {data_str}
+        The following chart patterns were detected deterministically:
+        {json.dumps(patterns, indent=2)}
 
-        Look for patterns like:
-        - Head and Shoulders
-        - Double Top/Bottom
-        - Triple Top/Bottom
-        - Cup and Handle
-        - Flags and Pennants
-        - Triangles (Ascending/Descending/Symmetrical)
-
-        For each pattern found, provide:
-        1. Pattern name
-        2. Start and end dates
-        3. Confidence level (0-100%)
-        4. Potential implications
+        {query}
+        Explain what these patterns mean together for a retail investor, in a few short paragraphs.
         """
-        return self._call_groq_and_parse_patterns(prompt)
+        return self._call_groq(prompt)
 
     def analyze_chart(self, data: pd.DataFrame, query: str) -> str:
-        data_str = data.to_string()
-        prompt = f"""
-        Given the following stock price data:
+        return self._call_groq(self._chart_prompt(data, query))
+
+    def stream_analyze_chart(self, data: pd.DataFrame, query: str) -> Iterator[str]:
+        """Same as analyze_chart, yielding the answer as Groq generates it."""
+        return stream_chat_completion(GROQ_API_KEY, GROQ_MODEL, self._messages(self._chart_prompt(data, query)), 0.7)
+
+    def _chart_prompt(self, data: pd.DataFrame, query: str) -> str:
+        data_str = compact_series(data, self.token_budget)
+        return f"""
+        Given the following stock price data (summarized to fit the prompt):
         {data_str}
 
         Please analyze the chart and answer this query: {query}
@@ -51,45 +93,327 @@ class PatternRecognizer:
         - Volume analysis
         - Potential turning points
         """
-        return self._call_groq(prompt)
 
     def _call_groq(self, prompt: str) -> str:
-        headers = {
-            "Authorization": f"Bearer {GROQ_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        payload = {
-            "model": GROQ_MODEL,
-            "messages": [
-                {"role": "system", "content": "You are a financial advisor. Provide accurate and helpful financial advice."},
-                {"role": "user", "content": prompt}
-            ],
-            "temperature": 0.7
-        }
-        response = requests.post(GROQ_API_URL, headers=headers, json=payload)
-        response.raise_for_status()
-        json_resp = response.json()
-        return json_resp["choices"][0]["message"]["content"]
-
-    def _call_groq_and_parse_patterns(self, prompt: str) -> List[Dict[str, Any]]:
-        analysis = self._call_groq(prompt)
-        return self._parse_patterns(analysis)
-
-    def _parse_patterns(self, analysis: str) -> List[Dict[str, Any]]:
-        patterns = []
-        lines = analysis.split('\n')
-        current_pattern = {}
-        for line in lines:
-            if 'Pattern:' in line:
-                if current_pattern:
-                    patterns.append(current_pattern)
-                current_pattern = {'name': line.split('Pattern:')[1].strip()}
-            elif 'Dates:' in line:
-                current_pattern['dates'] = line.split('Dates:')[1].strip()
-            elif 'Confidence:' in line:
-                current_pattern['confidence'] = float(line.split('Confidence:')[1].strip().replace('%', ''))
-            elif 'Implications:' in line:
-                current_pattern['implications'] = line.split('Implications:')[1].strip()
-        if current_pattern:
-            patterns.append(current_pattern)
-        return patterns 
\ No newline at end of file
+        return chat_completion(GROQ_API_KEY, GROQ_MODEL, self._messages(prompt), 0.7)
+
+    @staticmethod
+    def _messages(prompt: str) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": "You are a financial advisor. Provide accurate and helpful financial advice."},
+            {"role": "user", "content": prompt}
+        ]
+
+def detect_chart_patterns(dates: np.ndarray, close: np.ndarray,
+                          volume: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+    """
+    Find head-and-shoulders, double tops/bottoms, triangles and flags in a price series.
+    Returns patterns sorted by start date, each with start/end dates and a 0-100 confidence.
+    """
+    if len(close) < 10:
+        return []
+    atr = average_true_range(close)
+    # Closes must be positive and move at all; otherwise the relative measures below divide by zero
+    if not (close > 0).all() or not atr.any():
+        return []
+    order = max(2, len(close) // 50)
+    highs, lows = find_swing_points(close, order)
+
+    found = []
+    found += _head_and_shoulders(close, highs, lows, volume, inverse=False)
+    found += _head_and_shoulders(close, lows, highs, volume, inverse=True)
+    found += _double_extremes(close, highs, lows, inverse=False)
+    found += _double_extremes(close, lows, highs, inverse=True)
+    found += _triangles(close, highs, lows)
+    found += _flags(close, volume)
+    found = _suppress_overlaps([p for p in found if _stands_out(p, atr)])
+
+    patterns = []
+    for name, start, end, confidence, levels, _ in sorted(found, key=lambda p: (p[1], p[2])):
+        direction, implications = IMPLICATIONS[name]
+        patterns.append({
+            'name': name,
+            'start_date': str(dates[start]),
+            'end_date': str(dates[end]),
+            'confidence': confidence,
+            'direction': direction,
+            'implications': implications,
+            'levels': {key: round(float(value), 2) for key, value in levels.items()},
+        })
+    return patterns
+
+def find_swing_points(values: np.ndarray, order: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Indices of swing highs and lows: bars that are the max/min of the +-order bars around them."""
+    n = len(values)
+    if n < 2 * order + 1:
+        empty = np.array([], dtype=int)
+        return empty, empty
+    windows = np.lib.stride_tricks.sliding_window_view(values, 2 * order + 1)
+    center = values[order:n - order]
+    highs = np.flatnonzero(center >= windows.max(axis=1)) + order
+    lows = np.flatnonzero(center <= windows.min(axis=1)) + order
+    return _first_of_runs(highs), _first_of_runs(lows)
+
+def average_true_range(close: np.ndarray, bars: int = ATR_BARS) -> np.ndarray:
+    """
+    Per-bar average of the absolute close-to-close move over the trailing `bars` bars
+    (fewer at the start). Only closes are available here, so gaps inside a bar are not counted.
+    """
+    moves = np.abs(np.diff(close, prepend=close[0]))
+    totals = np.cumsum(moves)
+    lagged = np.concatenate([np.zeros(bars), totals[:-bars]])[:len(totals)]
+    counts = np.minimum(np.arange(len(close)), bars)
+    return np.divide(totals - lagged, counts, out=np.zeros(len(close)), where=counts > 0)
+
+def _stands_out(pattern, atr: np.ndarray) -> bool:
+    """Whether a pattern's height clears MIN_ATR_MULTIPLE * ATR * sqrt(its length in bars)."""
+    _, start, end, _, _, height = pattern
+    return height >= MIN_ATR_MULTIPLE * atr[start:end + 1].mean() * np.sqrt(end - start + 1)
+
+def _suppress_overlaps(found):
+    """Of overlapping detections of the same pattern, keep only the most confident."""
+    kept = []
+    for pattern in sorted(found, key=lambda p: -p[3]):
+        name, start, end = pattern[:3]
+        if not any(other[0] == name and other[1] <= end and start <= other[2] for other in kept):
+            kept.append(pattern)
+    return kept
+
+def _first_of_runs(indices: np.ndarray) -> np.ndarray:
+    """Collapse flat tops/bottoms (adjacent indices) to their first bar."""
+    if len(indices) == 0:
+        return indices
+    return indices[np.insert(np.diff(indices) > 1, 0, True)]
+
+def _confidence(*scores: float) -> float:
+    """Map component scores in [0, 1] to a 0-100 confidence with a 40 floor for a valid match."""
+    return round(40 + 60 * float(np.mean(np.clip(scores, 0, 1))), 1)
+
+def _head_and_shoulders(close, pivots, troughs, volume, inverse):
+    if len(pivots) < 3:
+        return []
+    sign = -1 if inverse else 1
+    prices = close[pivots]
+    left, head, right = prices[:-2], prices[1:-1], prices[2:]
+    shoulders = (left + right) / 2
+    prominence = sign * (head - shoulders) / shoulders
+    asymmetry = np.abs(left - right) / shoulders
+    candidates = np.flatnonzero((prominence >= MIN_PROMINENCE) & (asymmetry <= PEAK_TOLERANCE))
+
+    name = 'Inverse Head and Shoulders' if inverse else 'Head and Shoulders'
+    found = []
+    for i in candidates:
+        l, h, r = pivots[i], pivots[i + 1], pivots[i + 2]
+        left_trough = troughs[(troughs > l) & (troughs < h)]
+        right_trough = troughs[(troughs > h) & (troughs < r)]
+        if not len(left_trough) or not len(right_trough):
+            continue
+        pick = np.max if inverse else np.min
+        neckline = (pick(close[left_trough]) + pick(close[right_trough])) / 2
+        scores = [1 - asymmetry[i] / PEAK_TOLERANCE, prominence[i] / (3 * MIN_PROMINENCE)]
+        if volume is not None:
+            # Volume typically fades into the right shoulder
+            scores.append(float(volume[r - 1:r + 2].mean() < volume[l - 1:l + 2].mean()))
+        found.append((name, l, r, _confidence(*scores), {'neckline': neckline, 'head': close[h]},
+                      abs(close[h] - neckline)))
+    return found
+
+def _double_extremes(close, pivots, troughs, inverse):
+    if len(pivots) < 2:
+        return []
+    sign = -1 if inverse else 1
+    first, second = close[pivots[:-1]], close[pivots[1:]]
+    level = (first + second) / 2
+    mismatch = np.abs(first - second) / level
+
+    name = 'Double Bottom' if inverse else 'Double Top'
+    found = []
+    for i in np.flatnonzero(mismatch <= PEAK_TOLERANCE / 2):
+        a, b = pivots[i], pivots[i + 1]
+        between = troughs[(troughs > a) & (troughs < b)]
+        if not len(between):
+            continue
+        middle = close[between].max() if inverse else close[between].min()
+        depth = sign * (level[i] - middle) / level[i]
+        if depth < MIN_PROMINENCE:
+            continue
+        scores = [1 - mismatch[i] / (PEAK_TOLERANCE / 2), depth / (3 * MIN_PROMINENCE)]
+        found.append((name, a, b, _confidence(*scores), {'level': level[i], 'confirmation': middle},
+                      abs(level[i] - middle)))
+    return found
+
+def _line_fit(x: np.ndarray, y: np.ndarray) -> Tuple[float, float]:
+    """Return (total relative drift across x, r-squared) of a least-squares line."""
+    slope, intercept = np.polyfit(x, y, 1)
+    fitted = slope * x + intercept
+    total = ((y - y.mean()) ** 2).sum()
+    r_squared = 1 - ((y - fitted) ** 2).sum() / total if total else 1.0
+    return slope * (x[-1] - x[0]) / y.mean(), r_squared
+
+def _triangles(close, highs, lows):
+    highs, lows = highs[-TRIANGLE_PIVOTS:], lows[-TRIANGLE_PIVOTS:]
+    if len(highs) < 2 or len(lows) < 2:
+        return []
+    start = max(highs[0], lows[0])
+    highs, lows = highs[highs >= start - 1], lows[lows >= start - 1]
+    if len(highs) < 2 or len(lows) < 2:
+        return []
+    high_drift, high_fit = _line_fit(highs.astype(float), close[highs])
+    low_drift, low_fit = _line_fit(lows.astype(float), close[lows])
+
+    flat_highs, flat_lows = abs(high_drift) < FLAT_SLOPE, abs(low_drift) < FLAT_SLOPE
+    if flat_highs and low_drift >= FLAT_SLOPE:
+        name = 'Ascending Triangle'
+    elif flat_lows and high_drift <= -FLAT_SLOPE:
+        name = 'Descending Triangle'
+    elif high_drift <= -FLAT_SLOPE and low_drift >= FLAT_SLOPE:
+        name = 'Symmetrical Triangle'
+    else:
+        return []
+    touches = (len(highs) + len(lows)) / (2 * TRIANGLE_PIVOTS)
+    levels = {'resistance': close[highs[-1]], 'support': close[lows[-1]]}
+    height = close[highs].max() - close[lows].min()
+    return [(name, min(highs[0], lows[0]), max(highs[-1], lows[-1]), _confidence(high_fit, low_fit, touches), levels, height)]
+
+def _flags(close, volume):
+    lo, hi = FLAG_BARS
+    if len(close) < POLE_BARS + lo + 1:
+        return []
+    base = close[:-POLE_BARS]
+    moves = np.divide(close[POLE_BARS:] - base, base, out=np.zeros(len(base)), where=base != 0)
+    strong = np.abs(moves) >= MIN_POLE_MOVE
+
+    found = []
+    last_end = -1
+    for i in np.flatnonzero(strong):
+        pole_end = i + POLE_BARS
+        # Take the strongest bar of each run of qualifying poles, and don't overlap flags
+        if pole_end <= last_end or _stronger_pole_follows(moves, strong, i):
+            continue
+        flag = close[pole_end + 1:pole_end + 1 + hi]
+        if len(flag) < lo:
+            continue
+        pole_height = abs(close[pole_end] - close[i])
+        retrace = (flag.max() - flag.min()) / pole_height
+        drift = (flag[-1] - flag[0]) / pole_height
+        bullish = moves[i] > 0
+        # The flag should be tight and drift sideways or against the pole
+        if retrace > MAX_FLAG_RETRACE or (drift > 0.1 if bullish else drift < -0.1):
+            continue
+        scores = [1 - retrace / MAX_FLAG_RETRACE, abs(moves[i]) / (3 * MIN_POLE_MOVE)]
+        end = pole_end + len(flag)
+        if volume is not None:
+            scores.append(float(volume[i:pole_end + 1].mean() > volume[pole_end + 1:end + 1].mean()))
+        name = 'Bull Flag' if bullish else 'Bear Flag'
+        found.append((name, i, end, _confidence(*scores), {'pole_start': close[i], 'pole_end': close[pole_end]},
+                      pole_height))
+        last_end = end
+    return found
+
+def compact_series(data: pd.DataFrame, token_budget: int = PROMPT_TOKEN_BUDGET) -> str:
+    """
+    Summarize a price history into text that stays within token_budget however long it is:
+    summary statistics and support/resistance levels, a resampled OHLC table, and a
+    shape-preserving (LTTB) sample of closes. Row counts shrink until the text fits.
+    """
+    dates, close, volume = _price_arrays(data)
+    if not len(close):
+        return "No price data provided."
+
+    summary = _series_summary(dates, close, volume)
+    rows = max(4, (token_budget * CHARS_PER_TOKEN - len(summary)) // 40)
+    while True:
+        text = '\n'.join([
+            summary,
+            _resampled_table(dates, close, volume, rows // 2),
+            _shape_sample(dates, close, rows - rows // 2),
+        ])
+        if len(text) <= token_budget * CHARS_PER_TOKEN or rows <= 4:
+            return text
+        rows = max(4, int(rows * 0.75))
+
+def lttb_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: pick n_out points that keep the visual shape of y."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=float)
+    every = (n - 2) / (n_out - 2)
+    picked = [0]
+    a = 0
+    for i in range(n_out - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        picked.append(a)
+    picked.append(n - 1)
+    return np.array(picked)
+
+def _series_summary(dates: np.ndarray, close: np.ndarray, volume: Optional[np.ndarray]) -> str:
+    returns = np.diff(close) / close[:-1]
+    high, low = int(np.argmax(close)), int(np.argmin(close))
+    highs, lows = find_swing_points(close, max(2, len(close) // 50))
+    lines = [
+        f"Period: {dates[0]} to {dates[-1]} ({len(close)} bars)",
+        f"Close: start {close[0]:.2f}, end {close[-1]:.2f}, change {100 * (close[-1] / close[0] - 1):.2f}%",
+        f"High {close[high]:.2f} on {dates[high]}, low {close[low]:.2f} on {dates[low]}, mean {close.mean():.2f}",
+        f"Per-bar return volatility: {100 * returns.std():.2f}%" if len(returns) else "",
+    ]
+    for window in (20, 50, 200):
+        if len(close) >= window:
+            lines.append(f"SMA{window}: {close[-window:].mean():.2f}")
+    if len(highs):
+        lines.append("Resistance (recent swing highs): " + ', '.join(f"{close[i]:.2f}" for i in highs[-3:]))
+    if len(lows):
+        lines.append("Support (recent swing lows): " + ', '.join(f"{close[i]:.2f}" for i in lows[-3:]))
+    if volume is not None:
+        lines.append(f"Average volume: {volume.mean():.0f}, last: {volume[-1]:.0f}")
+    return '\n'.join(line for line in lines if line)
+
+def _resampled_table(dates: np.ndarray, close: np.ndarray, volume: Optional[np.ndarray], max_rows: int) -> str:
+    import pandas as pd
+    index = pd.DatetimeIndex(pd.to_datetime(dates))
+    prices = pd.Series(close, index=index)
+    for rule, label in RESAMPLE_RULES:
+        bars = prices.resample(rule).ohlc().dropna()
+        if len(bars) <= max_rows or rule == RESAMPLE_RULES[-1][0]:
+            break
+    bars = bars.tail(max_rows)
+    if volume is not None:
+        bars['volume'] = pd.Series(volume, index=index).resample(rule).sum().reindex(bars.index)
+    lines = [f"{label.capitalize()} OHLC (period,open,high,low,close{',volume' if volume is not None else ''}):"]
+    for period, bar in bars.iterrows():
+        row = f"{period:%Y-%m-%d},{bar['open']:.2f},{bar['high']:.2f},{bar['low']:.2f},{bar['close']:.2f}"
+        if volume is not None:
+            row += f",{bar['volume']:.0f}"
+        lines.append(row)
+    return '\n'.join(lines)
+
+def _shape_sample(dates: np.ndarray, close: np.ndarray, points: int) -> str:
+    picked = lttb_indices(close, points)
+    return "Shape-preserving close sample (date,close):\n" + '\n'.join(
+        f"{dates[i]},{close[i]:.2f}" for i in picked
+    )
+
+def _stronger_pole_follows(moves: np.ndarray, strong: np.ndarray, i: int) -> bool:
+    j = i + 1
+    return (j < len(moves) and strong[j] and np.sign(moves[j]) == np.sign(moves[i])
+            and abs(moves[j]) >= abs(moves[i]))
+
+def _price_arrays(data: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+    """Pull dates, closes and (if complete) volumes from a history frame, dropping bars without a close."""
+    import pandas as pd
+    if data.empty or 'Close' not in data:
+        return np.array([]), np.array([]), None
+    frame = data[pd.to_numeric(data['Close'], errors='coerce').notna()]
+    dates = pd.DatetimeIndex(pd.to_datetime(frame['Date'] if 'Date' in frame else frame.index)).strftime('%Y-%m-%d').to_numpy()
+    close = pd.to_numeric(frame['Close']).to_numpy(dtype=float)
+    volume = None
+    if 'Volume' in frame:
+        volume = pd.to_numeric(frame['Volume'], errors='coerce').to_numpy(dtype=float)
+        if not np.isfinite(volume).all():
+            volume = None
+    return dates, close, volume
@@ -1,16 +1,27 @@
-import requests
-from bs4 import BeautifulSoup
 import logging
-from typing import Dict, Any, List
-from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Any, List
 import json
 import re
+from .http_client import http_client
+from .ttl_cache import ttl_cache
+from .html_parsing import parse_html, SCREENER_TABLES, SCREENER_COMPANY
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class ScreenerFetcher:
+    # The parts of each page its parser reads; nothing else is built
+    page_strainers = {
+        '_parse_company_info': SCREENER_COMPANY,
+        '_parse_financial_ratios': SCREENER_TABLES,
+        '_parse_quarterly_results': SCREENER_TABLES,
+        '_parse_shareholding': SCREENER_TABLES,
+    }
+
     def __init__(self):
         self.base_url = "https://www.screener.in"
         self.headers = {
@@ -19,63 +30,63 @@ class ScreenerFetcher:
             "Accept-Language": "en-US,en;q=0.5",
         }
 
-    @lru_cache(maxsize=1000)
+    @ttl_cache(ttl_seconds=86400, max_entries=1000, method=True)
     def get_company_info(self, symbol: str) -> Dict[str, Any]:
         """Get company information from Screener.in."""
         try:
             url = f"{self.base_url}/company/{symbol}/"
-            response = requests.get(url, headers=self.headers)
+            response = http_client.get(url, headers=self.headers)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = parse_html(response.text, self.page_strainers['_parse_company_info'])
             return self._parse_company_info(soup)
         except Exception as e:
             logger.error(f"Error fetching company info for {symbol}: {str(e)}")
             return None
 
-    @lru_cache(maxsize=1000)
+    @ttl_cache(ttl_seconds=86400, max_entries=1000, method=True)
     def get_financial_ratios(self, symbol: str) -> Dict[str, Any]:
         """Get financial ratios from Screener.in."""
         try:
             url = f"{self.base_url}/company/{symbol}/ratios/"
-            response = requests.get(url, headers=self.headers)
+            response = http_client.get(url, headers=self.headers)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = parse_html(response.text, self.page_strainers['_parse_financial_ratios'])
             return self._parse_financial_ratios(soup)
         except Exception as e:
             logger.error(f"Error fetching financial ratios for {symbol}: {str(e)}")
             return None
 
-    @lru_cache(maxsize=1000)
+    @ttl_cache(ttl_seconds=86400, max_entries=1000, method=True)
     def get_quarterly_results(self, symbol: str) -> Dict[str, Any]:
         """Get quarterly results from Screener.in."""
         try:
             url = f"{self.base_url}/company/{symbol}/consolidated/"
-            response = requests.get(url, headers=self.headers)
+            response = http_client.get(url, headers=self.headers)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = parse_html(response.text, self.page_strainers['_parse_quarterly_results'])
             return self._parse_quarterly_results(soup)
         except Exception as e:
             logger.error(f"Error fetching quarterly results for {symbol}: {str(e)}")
             return None
 
-    @lru_cache(maxsize=1000)
+    @ttl_cache(ttl_seconds=86400, max_entries=1000, method=True)
     def get_shareholding(self, symbol: str) -> Dict[str, Any]:
         """Get shareholding pattern from Screener.in."""
         try:
             url = f"{self.base_url}/company/{symbol}/shareholding/"
-            response = requests.get(url, headers=self.headers)
+            response = http_client.get(url, headers=self.headers)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = parse_html(response.text, self.page_strainers['_parse_shareholding'])
             return self._parse_shareholding(soup)
         except Exception as e:
             logger.error(f"Error fetching shareholding for {symbol}: {str(e)}")
             return None
 
-    def _parse_company_info(self, soup: BeautifulSoup) -> Dict[str, Any]:
+    def _parse_company_info(self, soup: 'BeautifulSoup') -> Dict[str, Any]:
         """Parse company information from Screener.in HTML."""
         try:
             info = {}
@@ -99,7 +110,7 @@ class ScreenerFetcher:
             logger.error(f"Error parsing company info: {str(e)}")
             return None
 
-    def _parse_financial_ratios(self, soup: BeautifulSoup) -> Dict[str, Any]:
+    def _parse_financial_ratios(self, soup: 'BeautifulSoup') -> Dict[str, Any]:
         """Parse financial ratios from Screener.in HTML."""
         try:
             ratios = {}
@@ -120,7 +131,7 @@ class ScreenerFetcher:
             logger.error(f"Error parsing financial ratios: {str(e)}")
             return None
 
-    def _parse_quarterly_results(self, soup: BeautifulSoup) -> Dict[str, Any]:
+    def _parse_quarterly_results(self, soup: 'BeautifulSoup') -> Dict[str, Any]:
         """Parse quarterly results from Screener.in HTML."""
         try:
             results = {}
@@ -145,7 +156,7 @@ class ScreenerFetcher:
             logger.error(f"Error parsing quarterly results: {str(e)}")
             return None
 
-    def _parse_shareholding(self, soup: BeautifulSoup) -> Dict[str, Any]:
+    def _parse_shareholding(self, soup: 'BeautifulSoup') -> Dict[str, Any]:
         """Parse shareholding pattern from Screener.in HTML."""
         try:
             shareholding = {}
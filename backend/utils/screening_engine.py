@@ -0,0 +1,204 @@
+import logging
+import threading
+from typing import Dict, Any, List, Iterable, Optional, Tuple
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Numeric columns of a /screener/filter row
+SCREENER_METRICS = [
+    'price', 'pe', 'pb', 'bookValue', 'eps', 'dividendYield', 'roe', 'cagr5Y', 'debtToEquity',
+    'marketCap', 'beta', 'avgVolume', 'cashPerShare', 'priceToCashFlow', 'priceToFreeCashFlow'
+]
+
+# Every field of a /screener/filter row, for projections; rows sort by 'symbol' or any metric
+SCREENER_FIELDS = ['symbol', 'name', 'exchange'] + SCREENER_METRICS
+
+# Define which metrics should use <= for filtering
+LOWER_BOUND_METRICS = {
+    'pe', 'pb', 'debtToEquity', 'beta', 'priceToCashFlow', 'priceToFreeCashFlow'
+}
+
+class ColumnarSnapshot:
+    """
+    In-memory columnar copy of a stock universe.
+    Each metric is a float64 array (NaN where the row has no numeric value), alongside
+    symbol and exchange arrays, so a filter dict evaluates as vectorized boolean masks.
+    """
+
+    def __init__(self, metrics: Iterable[str], lower_bound_metrics: Iterable[str],
+                 ignore_unknown: bool = False, capacity: int = 256):
+        self.metrics = list(metrics)
+        self.lower_bound_metrics = set(lower_bound_metrics)
+        # When False, a filter on a column we don't hold rejects every row,
+        # matching the dict-based filter where a non-numeric value never passes
+        self.ignore_unknown = ignore_unknown
+        self._lock = threading.RLock()
+        self._size = 0
+        self._positions = {}
+        self._versions = []
+        self._rows = []
+        self._symbols = np.empty(capacity, dtype=object)
+        self._exchanges = np.empty(capacity, dtype=object)
+        self._columns = {metric: np.full(capacity, np.nan) for metric in self.metrics}
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def symbols(self) -> np.ndarray:
+        return self._symbols[:self._size]
+
+    @property
+    def exchanges(self) -> np.ndarray:
+        return self._exchanges[:self._size]
+
+    def column(self, metric: str) -> Optional[np.ndarray]:
+        column = self._columns.get(metric)
+        return None if column is None else column[:self._size]
+
+    def update(self, rows: Dict[str, Dict[str, Any]], versions: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Write changed rows into the columns in place, appending unseen symbols.
+        A row is only rewritten when its version (e.g. StockCache.updated_at) differs
+        from the one already held. Returns the number of rows written.
+        """
+        versions = versions or {}
+        written = 0
+        with self._lock:
+            for symbol, row in rows.items():
+                version = versions.get(symbol)
+                position = self._positions.get(symbol)
+                if position is None:
+                    position = self._append(symbol)
+                elif version is not None and self._versions[position] == version:
+                    continue
+
+                self._rows[position] = row
+                self._versions[position] = version
+                self._exchanges[position] = row.get('exchange')
+                for metric, column in self._columns.items():
+                    column[position] = _to_float(row.get(metric))
+                written += 1
+        return written
+
+    def mask(self, filters: Dict[str, Any]) -> np.ndarray:
+        """Evaluate a filter dict over every row; LOWER_BOUND metrics use <=, others >=."""
+        with self._lock:
+            n = self._size
+            selected = np.ones(n, dtype=bool)
+            for key, value in filters.items():
+                if not value:
+                    continue
+                column = self._columns.get(key)
+                if column is None:
+                    if self.ignore_unknown:
+                        continue
+                    return np.zeros(n, dtype=bool)
+                try:
+                    threshold = float(value)
+                except (TypeError, ValueError):
+                    logger.error(f"Invalid value for filter {key}: {value}")
+                    return np.zeros(n, dtype=bool)
+                column = column[:n]
+                if key in self.lower_bound_metrics:
+                    selected &= column <= threshold
+                else:
+                    selected &= column >= threshold
+            return selected
+
+    def screen(self, filters: Dict[str, Any], symbols: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Return the rows passing filters, in the order of symbols (or insertion order)."""
+        with self._lock:
+            selected = self.mask(filters)
+            if symbols is None:
+                positions = np.arange(self._size)
+            else:
+                positions = np.fromiter(
+                    (self._positions.get(symbol, -1) for symbol in symbols),
+                    dtype=np.intp, count=len(symbols)
+                )
+                positions = positions[positions >= 0]
+            return [self._rows[i] for i in positions[selected[positions]]]
+
+    def page(self, filters: Dict[str, Any], symbols: List[str], sort: str = 'symbol', descending: bool = False,
+             limit: Optional[int] = None, after: Optional[Tuple[Optional[float], str]] = None
+             ) -> Tuple[List[Dict[str, Any]], int, Optional[Tuple[Optional[float], str]]]:
+        """
+        One page of the rows passing filters, ordered by sort (a metric or 'symbol').
+        Ties break on symbol and rows without a value sort last either way, so
+        (value, symbol) is a total order: `after` is the key of the last row already
+        served, and the page starts right behind it.
+        Returns (rows, total matching rows, key of the last row if more follow, else None).
+        """
+        with self._lock:
+            selected = self.mask(filters)
+            positions = np.unique(np.fromiter(
+                (self._positions.get(symbol, -1) for symbol in symbols),
+                dtype=np.intp, count=len(symbols)
+            ))
+            positions = positions[positions >= 0]
+            positions = positions[selected[positions]]
+            total = len(positions)
+
+            keys = self._symbols[positions].astype(str)
+            if sort == 'symbol':
+                values = None
+                order = np.argsort(keys)[::-1] if descending else np.argsort(keys)
+            else:
+                values = self._columns[sort][positions]
+                # lexsort puts NaN last; negating keeps it there for descending order
+                order = np.lexsort((keys, -values if descending else values))
+            positions, keys = positions[order], keys[order]
+            values = None if values is None else values[order]
+
+            if after is not None:
+                after_value, after_key = after
+                if values is None:
+                    behind = keys < after_key if descending else keys > after_key
+                elif after_value is None:
+                    behind = np.isnan(values) & (keys > after_key)
+                else:
+                    ahead_of = values < after_value if descending else values > after_value
+                    behind = ahead_of | ((values == after_value) & (keys > after_key)) | np.isnan(values)
+                positions, keys = positions[behind], keys[behind]
+                values = None if values is None else values[behind]
+
+            if limit is None or len(positions) <= limit:
+                return [self._rows[i] for i in positions], total, None
+            last = limit - 1
+            last_value = None if values is None or np.isnan(values[last]) else float(values[last])
+            return [self._rows[i] for i in positions[:limit]], total, (last_value, str(keys[last]))
+
+    def _append(self, symbol: str) -> int:
+        if self._size == len(self._symbols):
+            self._grow()
+        position = self._size
+        self._size += 1
+        self._symbols[position] = symbol
+        self._positions[symbol] = position
+        self._rows.append(None)
+        self._versions.append(None)
+        return position
+
+    def _grow(self) -> None:
+        capacity = max(2 * len(self._symbols), 1)
+        self._symbols = _resized(self._symbols, capacity, None)
+        self._exchanges = _resized(self._exchanges, capacity, None)
+        for metric, column in self._columns.items():
+            self._columns[metric] = _resized(column, capacity, np.nan)
+
+def _to_float(value: Any) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    return np.nan
+
+def _resized(array: np.ndarray, capacity: int, fill: Any) -> np.ndarray:
+    resized = np.full(capacity, fill, dtype=array.dtype)
+    resized[:len(array)] = array
+    return resized
+
+# Shared snapshot of every row /screener/filter has seen, kept in sync with StockCache
+universe_snapshot = ColumnarSnapshot(SCREENER_METRICS, LOWER_BOUND_METRICS)
@@ -0,0 +1,60 @@
+import logging
+import struct
+from typing import List
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Arrow IPC is offered only when pyarrow is installed
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None
+
+JSON_MIMETYPE = 'application/json'
+# Packed little-endian typed arrays, see pack_bars
+PACKED_MIMETYPE = 'application/vnd.groqsense.bars'
+ARROW_MIMETYPE = 'application/vnd.apache.arrow.stream'
+
+PACKED_MAGIC = b'GSB1'
+
+def series_mimetypes() -> List[str]:
+    """Formats the historical endpoint can produce, JSON first so it wins ties and */*."""
+    mimetypes = [JSON_MIMETYPE, PACKED_MIMETYPE]
+    if pyarrow is not None:
+        mimetypes.append(ARROW_MIMETYPE)
+    return mimetypes
+
+def pack_bars(bars: np.ndarray) -> bytes:
+    """
+    Encode date/close/volume columns as packed typed arrays:
+
+        'GSB1' | uint32 count | int32[count] epoch days | pad to 8 bytes
+               | float64[count] close | int64[count] volume
+
+    all little-endian, so a browser can wrap each block in an Int32Array /
+    Float64Array / BigInt64Array over the same ArrayBuffer without parsing.
+    """
+    count = len(bars)
+    days = np.ascontiguousarray(bars['date'], dtype='<i4')
+    pad = b'\0' * ((-(8 + 4 * count)) % 8)
+    return b''.join([
+        PACKED_MAGIC, struct.pack('<I', count), days.tobytes(), pad,
+        np.ascontiguousarray(bars['close'], dtype='<f8').tobytes(),
+        np.ascontiguousarray(bars['volume'], dtype='<i8').tobytes(),
+    ])
+
+def arrow_bars(bars: np.ndarray) -> bytes:
+    """Encode date (date32), close and volume as a single-batch Arrow IPC stream."""
+    table = pyarrow.table({
+        'date': pyarrow.array(np.ascontiguousarray(bars['date'], dtype='<i4'), type=pyarrow.int32()).cast(pyarrow.date32()),
+        'close': pyarrow.array(np.ascontiguousarray(bars['close'])),
+        'volume': pyarrow.array(np.ascontiguousarray(bars['volume'])),
+    })
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
@@ -1,12 +1,12 @@
 import logging
-from functools import lru_cache
+from .ttl_cache import ttl_cache
 from .companies import NSE_COMPANIES, BSE_COMPANIES, NSE_NEXT_50, BSE_100, ALL_COMPANIES
 
 class StockListFetcher:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
 
-    @lru_cache(maxsize=1)
+    @ttl_cache(ttl_seconds=86400, max_entries=1, method=True, cache_if=bool)
     def get_nse_stocks(self):
         try:
             # Return Nifty 50 and Next 50 companies
@@ -15,7 +15,7 @@ class StockListFetcher:
             self.logger.error(f"Error fetching NSE stocks: {str(e)}")
             return []
 
-    @lru_cache(maxsize=1)
+    @ttl_cache(ttl_seconds=86400, max_entries=1, method=True, cache_if=bool)
     def get_bse_stocks(self):
         try:
             # Return Sensex 30 and BSE 100 companies
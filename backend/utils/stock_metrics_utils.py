@@ -1,6 +1,6 @@
-import yfinance as yf
 import logging
-from functools import lru_cache
+from .circuit_breaker import circuit_breakers, CIRCUIT_OPEN
+from .ttl_cache import ttl_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -9,15 +9,31 @@ logger = logging.getLogger(__name__)
 class StockMetricsFetcher:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        self.breaker = circuit_breakers['yfinance']
 
-    @lru_cache(maxsize=100)
+    @ttl_cache(ttl_seconds=900, max_entries=1000, method=True)
     def get_stock_metrics(self, symbol):
+        # Fail fast while yfinance is known to be down
+        if not self.breaker.allow():
+            return self._get_fallback_data(symbol, CIRCUIT_OPEN)
         try:
+            # yfinance is slow to import; load it on first fetch, not at boot
+            import yfinance as yf
+
             # Add .NS suffix for NSE stocks
             ticker = yf.Ticker(f"{symbol}.NS")
             
             # Get basic info
-            info = ticker.info
+            try:
+                info = ticker.info
+            except Exception as e:
+                # A 404 for a delisted ticker says nothing about yfinance's health
+                if _upstream_unhealthy(e):
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                raise
+            self.breaker.record_success()
             if not info:
                 self.logger.warning(f"No info found for {symbol}")
                 return self._get_fallback_data(symbol)
@@ -44,9 +60,10 @@ class StockMetricsFetcher:
             self.logger.error(f"Error fetching stock metrics for {symbol}: {str(e)}")
             return self._get_fallback_data(symbol)
     
-    def _get_fallback_data(self, symbol):
-        """Provide fallback data when API calls fail"""
+    def _get_fallback_data(self, symbol, reason=True):
+        """Provide fallback data when API calls fail; marked so it is never cached as real data"""
         return {
+            'fallback': reason,
             'price': 0,
             'pe': 0,
             'pb': 0,
@@ -61,5 +78,16 @@ class StockMetricsFetcher:
             'avgVolume': 0
         }
 
+def _upstream_unhealthy(error: Exception) -> bool:
+    """True for errors that count against the yfinance breaker: transport errors, 5xx and 429."""
+    from yfinance.exceptions import YFRateLimitError
+    if isinstance(error, YFRateLimitError):
+        return True
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    if status is not None:
+        return status >= 500 or status == 429
+    # requests and curl_cffi connection errors and timeouts are OSErrors
+    return isinstance(error, OSError)
+
 # Create a global instance
 stock_metrics_fetcher = StockMetricsFetcher() 
\ No newline at end of file
@@ -0,0 +1,135 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Iterator, Tuple, Optional
+from .stock_metrics_utils import stock_metrics_fetcher
+from .async_fetch import submit_fetch
+from .symbol_master import symbol_master
+from .ttl_cache import TTLCache
+from .circuit_breaker import CIRCUIT_OPEN
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Total worker threads used to resolve cache misses for one request
+FETCH_WORKERS = int(os.getenv('SCREENER_FETCH_WORKERS', '16'))
+
+# Per-upstream concurrency limits for blocking calls, shared by every request in this worker
+# (Tickertape goes through the async layer, which has its own limit)
+UPSTREAM_LIMITS = {
+    'yfinance': threading.BoundedSemaphore(int(os.getenv('YFINANCE_MAX_CONCURRENCY', '8'))),
+}
+
+# Symbols whose fetch just failed are not retried for this long (much shorter than the row cache)
+NEGATIVE_CACHE_SECONDS = float(os.getenv('NEGATIVE_CACHE_SECONDS', '300'))
+
+_recent_failures = TTLCache(NEGATIVE_CACHE_SECONDS, max_entries=10000, name='negative_fetch_cache')
+
+
+def build_stock_row(symbol: str, metrics: Dict[str, Any], tickertape_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Combine yfinance metrics and Tickertape overview into a screener row."""
+    return {
+        'symbol': symbol,
+        'name': tickertape_data.get('name', symbol),
+        'exchange': symbol_master.exchange_of(symbol),
+        'price': metrics.get('price', 0),
+        'pe': metrics.get('pe', 0),
+        'pb': metrics.get('pb', 0),
+        'bookValue': metrics.get('bookValue', 0),
+        'eps': metrics.get('eps', 0),
+        'dividendYield': metrics.get('dividendYield', 0),
+        'roe': metrics.get('roe', 0),
+        'cagr5Y': metrics.get('cagr5Y', 0),
+        'debtToEquity': metrics.get('debtToEquity', 0),
+        'marketCap': metrics.get('marketCap', 0),
+        'beta': metrics.get('beta', 0),
+        'avgVolume': metrics.get('avgVolume', 0),
+        'cashPerShare': metrics.get('cashPerShare', 0),
+        'priceToCashFlow': metrics.get('priceToCashFlow', 0),
+        'priceToFreeCashFlow': metrics.get('priceToFreeCashFlow', 0)
+    }
+
+
+def recently_failed(symbol: str) -> bool:
+    """True while a failed fetch for symbol is still negatively cached."""
+    return symbol in _recent_failures
+
+
+def _remember_failure(symbol: str) -> None:
+    _recent_failures.set(symbol, True)
+
+
+def _limited(source: str, fn, *args):
+    """Run an upstream call while holding that source's concurrency slot."""
+    with UPSTREAM_LIMITS[source]:
+        return fn(*args)
+
+
+def iter_stock_rows(symbols: List[str]) -> Iterator[Tuple[str, Optional[Dict[str, Any]]]]:
+    """
+    Fetch screener rows for symbols concurrently.
+    Both upstream sources for a symbol run at the same time; (symbol, row) pairs are
+    yielded as soon as each symbol completes. Row is None when no real metrics were
+    found (fallback data is never turned into a row); such symbols are negatively
+    cached and yield None straight away until NEGATIVE_CACHE_SECONDS pass. Symbols
+    skipped because the yfinance circuit was open also yield None but are not cached.
+    Tickertape is only asked for the name when the symbol master doesn't know it yet.
+    """
+    failed = {symbol for symbol in symbols if recently_failed(symbol)}
+    for symbol in failed:
+        yield symbol, None
+    symbols = [symbol for symbol in dict.fromkeys(symbols) if symbol not in failed]
+    if not symbols:
+        return
+
+    executor = ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(symbols)))
+    futures = {}
+    try:
+        pending = {}
+        for symbol in symbols:
+            pending[symbol] = {}
+            futures[executor.submit(_limited, 'yfinance', stock_metrics_fetcher.get_stock_metrics, symbol)] = (symbol, 'metrics')
+            name = symbol_master.name_of(symbol)
+            if name:
+                pending[symbol]['overview'] = {'name': name}
+            else:
+                # Runs on the shared event loop instead of holding a worker thread
+                futures[submit_fetch('tickertape', 'get_stock_overview', symbol)] = (symbol, 'overview')
+
+        for future in as_completed(futures):
+            symbol, part = futures[future]
+            try:
+                pending[symbol][part] = future.result()
+            except Exception as e:
+                logger.error(f"Error fetching {part} for {symbol}: {str(e)}")
+                pending[symbol][part] = None
+            if len(pending[symbol]) < 2:
+                continue
+
+            parts = pending.pop(symbol)
+            metrics = parts['metrics']
+            if not metrics or metrics.get('fallback'):
+                logger.warning(f"No metrics found for {symbol}")
+                # The symbol was never requested while the circuit was open
+                if not metrics or metrics.get('fallback') != CIRCUIT_OPEN:
+                    _remember_failure(symbol)
+                yield symbol, None
+                continue
+            overview = parts['overview']
+            if not overview or overview.get('fallback'):
+                # Keep a previously learned name rather than the symbol placeholder
+                overview = {'name': symbol_master.name_of(symbol) or symbol}
+            row = build_stock_row(symbol, metrics, overview)
+            symbol_master.learn_names({symbol: row})
+            yield symbol, row
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        for future in futures:
+            future.cancel()
+
+
+def fetch_stock_rows(symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Fetch screener rows for all symbols in parallel, skipping symbols without metrics."""
+    return {symbol: row for symbol, row in iter_stock_rows(symbols) if row}
@@ -1,56 +1,103 @@
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
 import logging
-from typing import List, Dict, Tuple
+import os
+import tempfile
+import threading
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
 import time
 import json
+from .http_client import http_client
+from .html_parsing import parse_html, LISTING_TABLE
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Versioned listings snapshot, also read by symbol_master. Written at runtime, so it
+# lives in the untracked data directory next to the OHLCV store
+SNAPSHOT_PATH = os.getenv(
+    'STOCK_SNAPSHOT_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'stock_data.json')
+)
+SNAPSHOT_VERSION = 1
+
+# Listing page and Yahoo-style suffix for each exchange
+LISTING_SOURCES = {
+    "NSE": ("https://www.nseindia.com/market-data/securities-available-for-trading", ".NS"),
+    "BSE": ("https://www.bseindia.com/corporates/List_Scrips.html", ".BO"),
+}
+
+# Headers to mimic browser request
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+}
+
+# One refresh at a time, so two callers don't both download and write the snapshot
+_refresh_lock = threading.Lock()
+
+def parse_listing(soup: 'BeautifulSoup', exchange: str) -> Dict[str, str]:
+    """
+    Read symbols and sectors from a listing table in one pass over its rows.
+    Returns {symbol with suffix: sector}; rows without a sector get "Unknown".
+    """
+    suffix = LISTING_SOURCES[exchange][1]
+    table = soup.find('table', {'class': 'table'})
+    if not table:
+        logger.error(f"Could not find stock table in {exchange} website")
+        return {}
+
+    listing = {}
+    for row in table.find_all('tr')[1:]:  # Skip header row
+        cols = row.find_all('td')
+        if len(cols) >= 2:
+            symbol = cols[1].text.strip()
+            if symbol:
+                sector = cols[2].text.strip() if len(cols) >= 3 else ''
+                listing[f"{symbol}{suffix}"] = sector or "Unknown"
+    return listing
+
+def fetch_listing(exchange: str, validators: Optional[Dict[str, str]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Download an exchange's listing page, conditionally when validators (etag /
+    last_modified from an earlier fetch) are given.
+    Returns None when the page is unchanged (304), otherwise
+    {'listing': {symbol: sector}, 'etag': ..., 'last_modified': ...}.
+    Raises on request errors and on pages without a listing table.
+    """
+    url = LISTING_SOURCES[exchange][0]
+    headers = dict(HEADERS)
+    if validators:
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+
+    response = http_client.get(url, headers=headers)
+    if response.status_code == 304:
+        return None
+    response.raise_for_status()
+
+    listing = parse_listing(parse_html(response.text, LISTING_TABLE), exchange)
+    if not listing:
+        raise ValueError(f"no stocks found on the {exchange} listing page")
+    logger.info(f"Successfully scraped {len(listing)} stocks from {exchange}")
+    return {
+        'listing': listing,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+    }
+
 def get_nse_stocks() -> List[str]:
     """
     Scrape all NSE-listed stocks from the NSE website.
     Returns a list of stock symbols with .NS suffix.
     """
     try:
-        # NSE URL for equity list
-        url = "https://www.nseindia.com/market-data/securities-available-for-trading"
-        
-        # Headers to mimic browser request
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.5",
-        }
-        
-        # Make the request
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        
-        # Parse the HTML
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Find the table containing stock data
-        table = soup.find('table', {'class': 'table'})
-        if not table:
-            logger.error("Could not find stock table in NSE website")
-            return []
-        
-        # Extract stock symbols
-        stocks = []
-        for row in table.find_all('tr')[1:]:  # Skip header row
-            cols = row.find_all('td')
-            if len(cols) >= 2:
-                symbol = cols[1].text.strip()
-                if symbol:
-                    stocks.append(f"{symbol}.NS")
-        
-        logger.info(f"Successfully scraped {len(stocks)} stocks from NSE")
-        return stocks
-        
+        return list(fetch_listing("NSE")['listing'])
     except Exception as e:
         logger.error(f"Error scraping NSE stocks: {str(e)}")
         return []
@@ -61,41 +108,7 @@ def get_bse_stocks() -> List[str]:
     Returns a list of stock symbols with .BO suffix.
     """
     try:
-        # BSE URL for equity list
-        url = "https://www.bseindia.com/corporates/List_Scrips.html"
-        
-        # Headers to mimic browser request
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.5",
-        }
-        
-        # Make the request
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        
-        # Parse the HTML
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Find the table containing stock data
-        table = soup.find('table', {'class': 'table'})
-        if not table:
-            logger.error("Could not find stock table in BSE website")
-            return []
-        
-        # Extract stock symbols
-        stocks = []
-        for row in table.find_all('tr')[1:]:  # Skip header row
-            cols = row.find_all('td')
-            if len(cols) >= 2:
-                symbol = cols[1].text.strip()
-                if symbol:
-                    stocks.append(f"{symbol}.BO")
-        
-        logger.info(f"Successfully scraped {len(stocks)} stocks from BSE")
-        return stocks
-        
+        return list(fetch_listing("BSE")['listing'])
     except Exception as e:
         logger.error(f"Error scraping BSE stocks: {str(e)}")
         return []
@@ -106,70 +119,89 @@ def get_stock_sectors(exchange: str) -> Dict[str, str]:
     Returns a dictionary mapping stock symbols to their sectors.
     """
     try:
-        if exchange == "NSE":
-            url = "https://www.nseindia.com/market-data/securities-available-for-trading"
-        else:
-            url = "https://www.bseindia.com/corporates/List_Scrips.html"
-            
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        }
-        
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        table = soup.find('table', {'class': 'table'})
-        
-        sectors = {}
-        for row in table.find_all('tr')[1:]:
-            cols = row.find_all('td')
-            if len(cols) >= 3:
-                symbol = cols[1].text.strip()
-                sector = cols[2].text.strip()
-                if symbol and sector:
-                    suffix = ".NS" if exchange == "NSE" else ".BO"
-                    sectors[f"{symbol}{suffix}"] = sector
-        
-        return sectors
-        
+        return fetch_listing(exchange)['listing']
     except Exception as e:
         logger.error(f"Error getting stock sectors for {exchange}: {str(e)}")
         return {}
 
+def load_snapshot(path: str = SNAPSHOT_PATH) -> Dict[str, Any]:
+    """The saved snapshot, or an empty one if it is missing, unreadable or from another version."""
+    empty = {'version': SNAPSHOT_VERSION, 'sources': {}, 'stocks': {}}
+    try:
+        with open(path) as f:
+            snapshot = json.load(f)
+    except FileNotFoundError:
+        return empty
+    except Exception as e:
+        logger.error(f"Error loading stock snapshot from {path}: {str(e)}")
+        return empty
+    if not isinstance(snapshot, dict) or snapshot.get('version') != SNAPSHOT_VERSION:
+        return empty
+    return snapshot
+
+def save_snapshot(snapshot: Dict[str, Any], path: str = SNAPSHOT_PATH) -> None:
+    """Write the snapshot compactly via a temp file and rename, so readers never see half a file."""
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.stock_data.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(snapshot, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+def refresh_snapshot(path: str = SNAPSHOT_PATH) -> Dict[str, Any]:
+    """
+    Bring the on-disk snapshot up to date and return it.
+    Each exchange's listing is requested with the validators from the last download,
+    so an unchanged listing costs one 304 and no parsing. A listing that fails to
+    download keeps its previous entries. The file is only rewritten when something changed.
+    """
+    with _refresh_lock:
+        snapshot = load_snapshot(path)
+        stocks = snapshot['stocks']
+        changed = False
+
+        for exchange in LISTING_SOURCES:
+            source = snapshot['sources'].get(exchange, {})
+            has_entries = any(details.get('exchange') == exchange for details in stocks.values())
+            try:
+                fetched = fetch_listing(exchange, source if has_entries else None)
+            except Exception as e:
+                logger.error(f"Error refreshing {exchange} listing: {str(e)}")
+                continue
+            if fetched is None:
+                logger.info(f"{exchange} listing unchanged")
+                continue
+
+            now = time.strftime("%Y-%m-%d %H:%M:%S")
+            # Replace this exchange's entries wholesale so delisted symbols drop out
+            for symbol in [s for s, details in stocks.items() if details.get('exchange') == exchange]:
+                del stocks[symbol]
+            for symbol, sector in fetched['listing'].items():
+                stocks[symbol] = {"sector": sector, "exchange": exchange, "last_updated": now}
+            snapshot['sources'][exchange] = {
+                'etag': fetched['etag'],
+                'last_modified': fetched['last_modified'],
+                'fetched_at': now,
+                'count': len(fetched['listing']),
+            }
+            changed = True
+
+        if changed:
+            snapshot['version'] = SNAPSHOT_VERSION
+            snapshot['generated_at'] = time.strftime("%Y-%m-%d %H:%M:%S")
+            try:
+                save_snapshot(snapshot, path)
+            except Exception as e:
+                logger.error(f"Error saving stock snapshot to {path}: {str(e)}")
+        return snapshot
+
 def get_all_stocks_with_sectors() -> Dict[str, Dict[str, str]]:
     """
     Get all NSE and BSE stocks with their sector information.
     Returns a dictionary with stock symbols as keys and their details as values.
     """
-    # Get NSE stocks
-    nse_stocks = get_nse_stocks()
-    nse_sectors = get_stock_sectors("NSE")
-    
-    # Get BSE stocks
-    bse_stocks = get_bse_stocks()
-    bse_sectors = get_stock_sectors("BSE")
-    
-    result = {}
-    
-    # Process NSE stocks
-    for stock in nse_stocks:
-        result[stock] = {
-            "sector": nse_sectors.get(stock, "Unknown"),
-            "exchange": "NSE",
-            "last_updated": time.strftime("%Y-%m-%d %H:%M:%S")
-        }
-    
-    # Process BSE stocks
-    for stock in bse_stocks:
-        result[stock] = {
-            "sector": bse_sectors.get(stock, "Unknown"),
-            "exchange": "BSE",
-            "last_updated": time.strftime("%Y-%m-%d %H:%M:%S")
-        }
-    
-    # Save to file for debugging
-    with open("stock_data.json", "w") as f:
-        json.dump(result, f, indent=2)
-    
-    return result 
\ No newline at end of file
+    return refresh_snapshot()['stocks']
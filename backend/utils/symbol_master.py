@@ -0,0 +1,175 @@
+import bisect
+import difflib
+import json
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Set
+from .companies import NSE_COMPANIES, BSE_COMPANIES, NSE_NEXT_50, BSE_100
+from .nifty50_list import nifty50
+from .stock_scraper import SNAPSHOT_PATH
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Scraped listings snapshot kept up to date by stock_scraper.refresh_snapshot
+LISTINGS_PATH = SNAPSHOT_PATH
+
+# Index lists and the exchange each one belongs to
+INDEX_MEMBERS = {
+    'nifty50': NSE_COMPANIES + [symbol[:-len('.NS')] for symbol in nifty50],
+    'niftynext50': NSE_NEXT_50,
+    'sensex30': BSE_COMPANIES,
+    'bse100': BSE_100,
+}
+INDEX_EXCHANGE = {
+    'nifty50': 'NSE',
+    'niftynext50': 'NSE',
+    'sensex30': 'BSE',
+    'bse100': 'BSE',
+}
+
+# Yahoo-style suffixes used by the scraped listings
+LISTING_SUFFIXES = {'.NS': 'NSE', '.BO': 'BSE'}
+
+class SymbolMaster:
+    """
+    One table of every known symbol with its name, sector, exchanges and index membership.
+    Membership lives in sets for O(1) checks, and sorted symbol/name-token lists back
+    prefix search; fuzzy matching fills in when prefixes find too little.
+    """
+
+    def __init__(self, listings_path: str = LISTINGS_PATH):
+        self._lock = threading.RLock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._exchange_members: Dict[str, Set[str]] = {'NSE': set(), 'BSE': set()}
+        self._index_members: Dict[str, Set[str]] = {}
+        self._sorted_symbols: List[str] = []
+        self._sorted_tokens: List[tuple] = []
+        self._dirty = True
+
+        for index, members in INDEX_MEMBERS.items():
+            for symbol in members:
+                self._add(symbol, exchange=INDEX_EXCHANGE[index], index=index)
+        self._load_listings(listings_path)
+
+    def exchange_of(self, symbol: str) -> str:
+        """'NSE' if the symbol trades on NSE, otherwise 'BSE'."""
+        return 'NSE' if symbol in self._exchange_members['NSE'] else 'BSE'
+
+    def is_listed(self, symbol: str, exchange: str) -> bool:
+        return symbol in self._exchange_members.get(exchange, ())
+
+    def in_index(self, symbol: str, index: str) -> bool:
+        return symbol in self._index_members.get(index, ())
+
+    def name_of(self, symbol: str) -> Optional[str]:
+        entry = self._entries.get(symbol)
+        return entry['name'] if entry else None
+
+    def learn_names(self, rows: Dict[str, Dict[str, Any]]) -> None:
+        """Record company names from screener rows (e.g. StockCache data) for search."""
+        with self._lock:
+            for symbol, row in rows.items():
+                name = row.get('name')
+                if not name or name == symbol:
+                    continue
+                entry = self._add(symbol)
+                if entry['name'] != name:
+                    entry['name'] = name
+                    self._dirty = True
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Prefix match on symbols and name words, topped up with fuzzy matches."""
+        query = query.strip().upper()
+        if not query:
+            return []
+        with self._lock:
+            if self._dirty:
+                self._rebuild()
+            matches = list(dict.fromkeys(
+                self._symbols_with_prefix(query, limit) + self._names_with_prefix(query, limit)
+            ))
+            if len(matches) < limit:
+                candidates = self._sorted_symbols + [token for token, _ in self._sorted_tokens]
+                owners = {token: symbol for token, symbol in self._sorted_tokens}
+                for close in difflib.get_close_matches(query, candidates, n=limit, cutoff=0.6):
+                    symbol = close if close in self._entries else owners[close]
+                    if symbol not in matches:
+                        matches.append(symbol)
+            return [self._describe(symbol) for symbol in matches[:limit]]
+
+    def _add(self, symbol: str, exchange: Optional[str] = None, index: Optional[str] = None,
+             sector: Optional[str] = None) -> Dict[str, Any]:
+        entry = self._entries.get(symbol)
+        if entry is None:
+            entry = {'name': None, 'sector': None, 'exchanges': set(), 'indices': set()}
+            self._entries[symbol] = entry
+            self._dirty = True
+        if exchange:
+            entry['exchanges'].add(exchange)
+            self._exchange_members[exchange].add(symbol)
+        if index:
+            entry['indices'].add(index)
+            self._index_members.setdefault(index, set()).add(symbol)
+        if sector and sector != 'Unknown':
+            entry['sector'] = sector
+        return entry
+
+    def _load_listings(self, path: str) -> None:
+        try:
+            with open(path) as f:
+                listings = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.error(f"Error loading scraped listings from {path}: {str(e)}")
+            return
+        # Versioned snapshots keep the symbol map under 'stocks'
+        listings = listings.get('stocks', listings)
+        for listed, details in listings.items():
+            for suffix, exchange in LISTING_SUFFIXES.items():
+                if listed.endswith(suffix):
+                    self._add(listed[:-len(suffix)], exchange=exchange, sector=details.get('sector'))
+                    break
+
+    def _rebuild(self) -> None:
+        self._sorted_symbols = sorted(self._entries)
+        tokens = set()
+        for symbol, entry in self._entries.items():
+            for token in (entry['name'] or '').upper().split():
+                tokens.add((token, symbol))
+        self._sorted_tokens = sorted(tokens)
+        self._dirty = False
+
+    def _symbols_with_prefix(self, prefix: str, limit: int) -> List[str]:
+        found = []
+        start = bisect.bisect_left(self._sorted_symbols, prefix)
+        for symbol in self._sorted_symbols[start:start + limit]:
+            if not symbol.startswith(prefix):
+                break
+            found.append(symbol)
+        return found
+
+    def _names_with_prefix(self, prefix: str, limit: int) -> List[str]:
+        found = []
+        start = bisect.bisect_left(self._sorted_tokens, (prefix,))
+        for token, symbol in self._sorted_tokens[start:]:
+            if not token.startswith(prefix) or len(found) >= limit:
+                break
+            if symbol not in found:
+                found.append(symbol)
+        return found
+
+    def _describe(self, symbol: str) -> Dict[str, Any]:
+        entry = self._entries[symbol]
+        return {
+            'symbol': symbol,
+            'name': entry['name'] or symbol,
+            'sector': entry['sector'],
+            'exchanges': sorted(entry['exchanges']),
+            'indices': sorted(entry['indices']),
+        }
+
+# Create a global instance
+symbol_master = SymbolMaster()
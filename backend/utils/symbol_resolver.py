@@ -0,0 +1,122 @@
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy.exc import SQLAlchemyError
+from models.symbol_suffix import SymbolSuffix
+from .db import SessionLocal
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Suffixes probed, in order, for a symbol given without one
+EXCHANGE_SUFFIXES = ['.NS', '.BSE']
+
+class SymbolResolver:
+    """
+    Remembers which ticker (bare, .NS or .BSE) has data for a symbol.
+    Results are kept in memory and persisted in the symbol_suffix table; misses are
+    cached too, with a much shorter TTL, so a bad symbol doesn't re-probe upstream.
+    Misses are scoped (e.g. to an interval and period), because a short window can be
+    empty for a ticker that has data over a longer one.
+    """
+
+    def __init__(self, hit_ttl_hours: float = 24 * 30, miss_ttl_hours: float = 6):
+        self.hit_ttl = timedelta(hours=hit_ttl_hours)
+        self.miss_ttl = timedelta(hours=miss_ttl_hours)
+        self._memory: Dict[str, Tuple[Optional[str], datetime]] = {}
+        self._lock = threading.Lock()
+
+    def candidates(self, symbol: str) -> List[str]:
+        if any(symbol.endswith(suffix) for suffix in EXCHANGE_SUFFIXES):
+            return [symbol]
+        return [symbol] + [symbol + suffix for suffix in EXCHANGE_SUFFIXES]
+
+    def lookup(self, symbol: str) -> Tuple[bool, Optional[str]]:
+        """Return (known, resolved); resolved is None for a cached miss."""
+        with self._lock:
+            entry = self._memory.get(symbol)
+        if entry is None:
+            entry = self._load(symbol)
+            if entry is None:
+                return False, None
+            with self._lock:
+                self._memory[symbol] = entry
+
+        resolved, checked_at = entry
+        ttl = self.hit_ttl if resolved else self.miss_ttl
+        if datetime.utcnow() - checked_at > ttl:
+            return False, None
+        return True, resolved
+
+    def record(self, symbol: str, resolved: Optional[str]) -> None:
+        checked_at = datetime.utcnow()
+        with self._lock:
+            self._memory[symbol] = (resolved, checked_at)
+        session = SessionLocal()
+        try:
+            session.merge(SymbolSuffix(symbol=symbol, resolved=resolved, checked_at=checked_at))
+            session.commit()
+        except SQLAlchemyError as e:
+            logger.error(f"Database error recording suffix for {symbol}: {str(e)}")
+            session.rollback()
+        finally:
+            session.close()
+
+    def resolve(self, symbol: str, probe: Callable[[str], Any],
+                scope: Optional[str] = None) -> Tuple[Optional[str], Any]:
+        """
+        Return (ticker, data) for the first candidate whose probe returns non-empty data.
+        A remembered ticker is probed first; a remembered miss for this scope returns
+        (None, None) without probing.
+        A miss is only recorded when every candidate came back empty without raising,
+        and never replaces a known-good ticker. If a probe raised and nothing was found,
+        the last error is re-raised.
+        """
+        miss_key = f"{symbol}@{scope}" if scope else symbol
+        known, resolved = self.lookup(symbol)
+        if not resolved:
+            missed, _ = self.lookup(miss_key)
+            if missed:
+                return None, None
+
+        errors = []
+        # The remembered ticker first, then the rest in suffix order
+        candidates = list(dict.fromkeys(([resolved] if resolved else []) + self.candidates(symbol)))
+        for candidate in candidates:
+            try:
+                data = probe(candidate)
+            except Exception as e:
+                logger.warning(f"Probe of {candidate} failed: {str(e)}")
+                errors.append(e)
+                continue
+            if len(data):
+                if candidate != resolved:
+                    self.record(symbol, candidate)
+                return candidate, data
+
+        if errors:
+            raise errors[-1]
+        if not resolved:
+            self.record(miss_key, None)
+        return None, None
+
+    def _load(self, symbol: str) -> Optional[Tuple[Optional[str], datetime]]:
+        session = SessionLocal()
+        try:
+            row = session.query(SymbolSuffix).filter_by(symbol=symbol).first()
+            return (row.resolved, row.checked_at) if row else None
+        except SQLAlchemyError as e:
+            logger.error(f"Database error loading suffix for {symbol}: {str(e)}")
+            session.rollback()
+            return None
+        finally:
+            session.close()
+
+# Create a global instance
+symbol_resolver = SymbolResolver(
+    hit_ttl_hours=float(os.getenv('SYMBOL_RESOLVER_HIT_TTL_HOURS', '720')),
+    miss_ttl_hours=float(os.getenv('SYMBOL_RESOLVER_MISS_TTL_HOURS', '6'))
+)
@@ -1,9 +1,9 @@
-import requests
-from bs4 import BeautifulSoup
 import logging
 from typing import Dict, Any, List
-from functools import lru_cache
 import json
+from .http_client import http_client
+from .ttl_cache import ttl_cache
+from .circuit_breaker import circuit_breakers
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -17,45 +17,61 @@ class TickertapeFetcher:
             "Accept": "application/json",
         }
         self.logger = logging.getLogger(__name__)
+        self.breaker = circuit_breakers['tickertape']
 
-    @lru_cache(maxsize=100)
+    @ttl_cache(ttl_seconds=86400, max_entries=1000, method=True)
     def get_stock_overview(self, symbol):
+        # Fail fast while Tickertape is known to be down
+        if not self.breaker.allow():
+            return self._get_fallback_data(symbol)
         try:
             url = f"{self.base_url}/stocks/{symbol}/overview"
-            response = requests.get(url, headers=self.headers)
+            try:
+                response = http_client.get(url, headers=self.headers)
+            except Exception:
+                self.breaker.record_failure()
+                raise
+            # A 404 for one symbol says nothing about Tickertape's health
+            if response.status_code >= 500 or response.status_code == 429:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
             response.raise_for_status()
-            
-            data = response.json()
-            if not data:
-                self.logger.warning(f"No data found for {symbol}")
-                return self._get_fallback_data(symbol)
-            
-            return {
-                'name': data.get('name', symbol),
-                'sector': data.get('sector', 'Unknown'),
-                'industry': data.get('industry', 'Unknown'),
-                'description': data.get('description', 'No description available')
-            }
-            
+
+            return self._parse_stock_overview(response.json(), symbol)
+
         except Exception as e:
             self.logger.error(f"Error fetching stock overview for {symbol}: {str(e)}")
             return self._get_fallback_data(symbol)
     
+    def _parse_stock_overview(self, data, symbol):
+        if not data:
+            self.logger.warning(f"No data found for {symbol}")
+            return self._get_fallback_data(symbol)
+
+        return {
+            'name': data.get('name', symbol),
+            'sector': data.get('sector', 'Unknown'),
+            'industry': data.get('industry', 'Unknown'),
+            'description': data.get('description', 'No description available')
+        }
+
     def _get_fallback_data(self, symbol):
-        """Provide fallback data when API calls fail"""
+        """Provide fallback data when API calls fail; marked so it is never cached as real data"""
         return {
+            'fallback': True,
             'name': symbol,
             'sector': 'Unknown',
             'industry': 'Unknown',
             'description': 'No description available'
         }
 
-    @lru_cache(maxsize=1000)
+    @ttl_cache(ttl_seconds=900, max_entries=1000, method=True)
     def get_technical_analysis(self, symbol: str) -> Dict[str, Any]:
         """Get technical analysis data for a symbol."""
         try:
             url = f"{self.base_url}/stocks/{symbol}/technical"
-            response = requests.get(url, headers=self.headers)
+            response = http_client.get(url, headers=self.headers)
             response.raise_for_status()
             
             data = response.json()
@@ -64,12 +80,12 @@ class TickertapeFetcher:
             logger.error(f"Error fetching technical analysis for {symbol}: {str(e)}")
             return None
 
-    @lru_cache(maxsize=1000)
+    @ttl_cache(ttl_seconds=86400, max_entries=1000, method=True)
     def get_fundamental_analysis(self, symbol: str) -> Dict[str, Any]:
         """Get fundamental analysis data for a symbol."""
         try:
             url = f"{self.base_url}/stocks/{symbol}/fundamentals"
-            response = requests.get(url, headers=self.headers)
+            response = http_client.get(url, headers=self.headers)
             response.raise_for_status()
             
             data = response.json()
@@ -78,12 +94,12 @@ class TickertapeFetcher:
             logger.error(f"Error fetching fundamental analysis for {symbol}: {str(e)}")
             return None
 
-    @lru_cache(maxsize=1000)
+    @ttl_cache(ttl_seconds=86400, max_entries=1000, method=True)
     def get_peer_comparison(self, symbol: str) -> Dict[str, Any]:
         """Get peer comparison data for a symbol."""
         try:
             url = f"{self.base_url}/stocks/{symbol}/peers"
-            response = requests.get(url, headers=self.headers)
+            response = http_client.get(url, headers=self.headers)
             response.raise_for_status()
             
             data = response.json()
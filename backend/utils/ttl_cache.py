@@ -0,0 +1,138 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+from .single_flight import SingleFlight
+
+# Returned by TTLCache.get on a miss, so None can still be a cached value
+MISSING = object()
+
+# Every named cache, for stats and bulk invalidation
+_registry: Dict[str, 'TTLCache'] = {}
+_registry_lock = threading.Lock()
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire ttl_seconds after they are set.
+    Past max_entries the least recently used entry is evicted. Hits, misses,
+    evictions and expirations are counted for stats().
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024, name: Optional[str] = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.name = name
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        if name:
+            with _registry_lock:
+                _registry[name] = self
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() >= entry[1]:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable = MISSING) -> None:
+        """Drop one key, or everything when no key is given."""
+        with self._lock:
+            if key is MISSING:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and time.monotonic() < entry[1]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxEntries': self.max_entries,
+                'ttlSeconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hitRate': round(self.hits / lookups, 4) if lookups else None,
+            }
+
+def is_cacheable(value: Any) -> bool:
+    """Default cache_if: skip None and payloads marked as fallback data."""
+    return value is not None and not (isinstance(value, dict) and value.get('fallback'))
+
+def ttl_cache(ttl_seconds: float, max_entries: int = 1024, method: bool = False,
+              cache_if: Callable[[Any], bool] = is_cacheable):
+    """
+    Memoize a function in a TTLCache named after it.
+    With method=True the first argument (self) is left out of the key, so stateless
+    fetcher instances share entries and are not pinned in memory by the cache.
+    Results for which cache_if is false are returned but not stored.
+    Concurrent misses for the same key are coalesced, so only one of them goes upstream.
+    The cache is reachable as wrapper.cache (stats(), invalidate()).
+    """
+    def decorator(fn):
+        cache = TTLCache(ttl_seconds, max_entries, name=fn.__qualname__)
+        flights = SingleFlight()
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key_args = args[1:] if method else args
+            key = (key_args, tuple(sorted(kwargs.items()))) if kwargs else key_args
+            value = cache.get(key)
+            if value is not MISSING:
+                return value
+
+            def load():
+                result = fn(*args, **kwargs)
+                if cache_if(result):
+                    cache.set(key, result)
+                return result
+            return flights.do(key, load)
+
+        wrapper.cache = cache
+        wrapper.flights = flights
+        return wrapper
+    return decorator
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats for every named cache."""
+    with _registry_lock:
+        caches = dict(_registry)
+    return {name: cache.stats() for name, cache in caches.items()}
+
+def invalidate_all() -> None:
+    with _registry_lock:
+        caches = list(_registry.values())
+    for cache in caches:
+        cache.invalidate()
@@ -88,10 +88,9 @@ const Screener = () => {
   const fetchStocks = async () => {
     setLoading(true);
     try {
-      const response = await API.post('/screener/filter', {
-        filters: {},
-        exchange: exchange,
-        index: index
+      // GET so the browser can revalidate the screen and reuse its copy on a 304
+      const response = await API.get('/screener/filter', {
+        params: { exchange: exchange, index: index }
       });
       setAllStocks(response.data);
       setFilteredStocks(response.data);